@@ -0,0 +1,108 @@
+"""
+Build a CRLite filter cascade for one CA level and have the level's nodes
+threshold-sign it.
+
+Revoked serials come from the level's CRL (proven entries only, synced
+with crl_sync); valid serials are every other certificate issued by that
+level found under --certs-dir. The filter covers exactly those serials;
+clients check any other certificate with the nodes. Each node checks that
+the filter covers and reports all revocations it knows of before it
+signs. The signed filter is written to <out-dir>/level{n}.crlite, where
+`client.is_valid --filter` picks it up.
+Clients ignore the filter once --validity seconds have passed, so rebuild
+it more often than that.
+"""
+import os
+import glob
+import argparse
+
+import proto.ca_pb2 as pb
+from common.cert import Certificate
+from common.channels import get_stub
+from common.crlite import FilterCascade, filter_message, filter_path, save_signed, DEFAULT_VALIDITY
+from common.ocsp import now
+from common.engine import get_engine
+from common.fanout import collect_verified_partials, latency_tracker, FANOUT_STRATEGIES, HEDGE_PERCENTILE
+from common.shares import load_share_pks, verify_partials
+from common.util import precompute_lagrange
+from client.crl_sync import sync_crl
+from client.sign import aggregate_threshold, PARTIAL_TIMEOUT
+
+engine = get_engine()
+
+
+def issued_serials(certs_dir: str, level: int):
+    """Serials of all certificates issued by Level{level}CA in the PEM files under certs_dir."""
+    serials = set()
+    for path in glob.glob(os.path.join(certs_dir, "*.pem")):
+        with open(path, "rb") as f:
+            for cert in Certificate.from_pem(f.read()):
+                if cert.issuer_cn == f"Level{level}CA":
+                    serials.add(cert.serial)
+    return serials
+
+
+def build_filter(level: int, revoked, valid, validity: int = DEFAULT_VALIDITY) -> bytes:
+    built_at = now()
+    cascade = FilterCascade.build(revoked, valid, level, built_at, built_at + validity)
+    blob = cascade.to_bytes()
+    print(f"Filter for level {level}: {len(revoked)} revoked, {len(valid)} known serials, "
+          f"{len(cascade.filters)} levels, {len(blob)} bytes")
+    return blob
+
+
+def sign_filter(blob: bytes, level: int, node_addresses, threshold: int, master_pk,
+                strategy: str = "hedged", hedge_percentile: float = HEDGE_PERCENTILE) -> bytes:
+    """Collect threshold partials on the filter and return the verified aggregate signature."""
+    msg = filter_message(blob)
+    req = pb.FilterSignReq(filter=blob)
+    share_pks = load_share_pks(level)
+    precompute_lagrange(len(node_addresses), threshold)
+
+    def invoke(addr):
+        return get_stub(addr).SignFilterPartial.future(req, timeout=PARTIAL_TIMEOUT)
+
+    parts = collect_verified_partials(node_addresses, invoke, threshold,
+                                      lambda ps: verify_partials(msg, ps, share_pks),
+                                      strategy, latency_tracker("SignFilterPartial"), hedge_percentile)
+    if len(parts) < threshold:
+        raise RuntimeError("INSUFFICIENT PARTIALS for filter")
+    agg = aggregate_threshold(parts)
+    if not engine.pairing_check([(agg, engine.G1_neg), (engine.hash_to_g2(msg), master_pk)]):
+        raise RuntimeError("aggregated filter signature does not verify")
+    return engine.g2_to_bytes(agg)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build and threshold-sign a CRLite filter for a CA level")
+    ap.add_argument("--level", type=int, default=1, help="CA level whose certificates the filter covers")
+    ap.add_argument("--certs-dir", default="certs", help="Where to find issued certificates")
+    ap.add_argument("--out-dir", default="crlite", help="Where to write level{n}.crlite")
+    ap.add_argument("--validity", type=int, default=DEFAULT_VALIDITY,
+                    help="Seconds until clients stop trusting the filter")
+    ap.add_argument("--threshold", type=int, default=int(os.getenv("THRESHOLD", "2")))
+    ap.add_argument("--fanout", choices=FANOUT_STRATEGIES, default="hedged")
+    ap.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE)
+    args = ap.parse_args()
+
+    node_addresses = os.getenv(f"LEVEL{args.level}_NODES", "").split(",")
+    if node_addresses == [""]:
+        raise RuntimeError(f"Missing env LEVEL{args.level}_NODES")
+    with open(f"level{args.level}_master_pk.hex") as f:
+        master_pk = engine.g1_from_bytes(bytes.fromhex(f.read().strip()))
+
+    crl = sync_crl(args.level, node_addresses[0], master_pk)
+    revoked = {serial for serial in crl.entries if crl.is_revoked(serial, proven_only=True)}
+    valid = issued_serials(args.certs_dir, args.level) - revoked
+
+    blob = build_filter(args.level, revoked, valid, args.validity)
+    sig = sign_filter(blob, args.level, node_addresses, args.threshold, master_pk,
+                      args.fanout, args.hedge_percentile)
+    os.makedirs(args.out_dir, exist_ok=True)
+    path = filter_path(args.out_dir, args.level)
+    save_signed(path, blob, sig)
+    print("Signed filter saved to", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Threshold-sign the Merkle root of a CA level's CRL for the current epoch.
+
+The proven revocations are synced from the level's nodes (crl_sync), the
+sorted Merkle tree over them is built, and the nodes are asked to
+partial-sign its root; each node only signs if the root matches its own
+CRL. The aggregated root is then sent to every node with ApplyRoot, after
+which their OCSP answers carry inclusion / non-inclusion proofs that
+clients check against that one signature. With --interval the root is
+re-signed periodically (once per epoch is enough).
+"""
+import os
+import time
+import argparse
+
+import proto.ca_pb2 as pb
+from common.channels import get_stub
+from common.engine import get_engine
+from common.fanout import collect_verified_partials, latency_tracker, FANOUT_STRATEGIES, HEDGE_PERCENTILE
+from common.merkle import MerkleTree, root_message, current_epoch, EPOCH_SECONDS
+from common.shares import load_share_pks, verify_partials
+from common.util import precompute_lagrange
+from client.crl_sync import sync_crl
+from client.sign import aggregate_threshold, PARTIAL_TIMEOUT
+
+engine = get_engine()
+
+
+def sign_root(tree: MerkleTree, epoch: int, level: int, node_addresses, threshold: int, master_pk,
+              strategy: str = "hedged", hedge_percentile: float = HEDGE_PERCENTILE) -> pb.SignedCRLRoot:
+    """Collect threshold partials on the tree's root and return the verified signed root."""
+    msg = root_message(epoch, len(tree), tree.root)
+    req = pb.CRLRootSignReq(epoch=epoch, size=len(tree), root=tree.root)
+    share_pks = load_share_pks(level)
+
+    def invoke(addr):
+        return get_stub(addr).SignRootPartial.future(req, timeout=PARTIAL_TIMEOUT)
+
+    parts = collect_verified_partials(node_addresses, invoke, threshold,
+                                      lambda ps: verify_partials(msg, ps, share_pks),
+                                      strategy, latency_tracker("SignRootPartial"), hedge_percentile)
+    if len(parts) < threshold:
+        raise RuntimeError("INSUFFICIENT PARTIALS for CRL root")
+    agg = aggregate_threshold(parts)
+    if not engine.pairing_check([(agg, engine.G1_neg), (engine.hash_to_g2(msg), master_pk)]):
+        raise RuntimeError("aggregated root signature does not verify")
+    return pb.SignedCRLRoot(epoch=epoch, size=len(tree), root=tree.root,
+                            threshold_sig=engine.g2_to_bytes(agg))
+
+
+def broadcast_root(root: pb.SignedCRLRoot, node_addresses):
+    for addr in node_addresses:
+        try:
+            resp = get_stub(addr).ApplyRoot(root, timeout=3)
+            print(f"{addr} ApplyRoot:", resp.ok, resp.msg)
+        except Exception as e:
+            print(f"{addr} ApplyRoot failed:", e)
+
+
+def publish_root(level: int, node_addresses, threshold: int, master_pk,
+                 strategy: str = "hedged", hedge_percentile: float = HEDGE_PERCENTILE):
+    crl = sync_crl(level, node_addresses[0], master_pk)
+    tree = MerkleTree(serial for serial in crl.entries if crl.is_revoked(serial, proven_only=True))
+    epoch = current_epoch()
+    print(f"Level {level}, epoch {epoch}: {len(tree)} revocations, root {tree.root.hex()}")
+    root = sign_root(tree, epoch, level, node_addresses, threshold, master_pk, strategy, hedge_percentile)
+    broadcast_root(root, node_addresses)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Threshold-sign the Merkle root of a CA level's CRL")
+    ap.add_argument("--level", type=int, default=1, help="CA level whose CRL to sign")
+    ap.add_argument("--interval", type=int, default=0,
+                    help=f"Re-sign every N seconds (0: sign once and exit; epochs are {EPOCH_SECONDS}s)")
+    ap.add_argument("--threshold", type=int, default=int(os.getenv("THRESHOLD", "2")))
+    ap.add_argument("--fanout", choices=FANOUT_STRATEGIES, default="hedged")
+    ap.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE)
+    args = ap.parse_args()
+
+    node_addresses = os.getenv(f"LEVEL{args.level}_NODES", "").split(",")
+    if node_addresses == [""]:
+        raise RuntimeError(f"Missing env LEVEL{args.level}_NODES")
+    with open(f"level{args.level}_master_pk.hex") as f:
+        master_pk = engine.g1_from_bytes(bytes.fromhex(f.read().strip()))
+    precompute_lagrange(len(node_addresses), args.threshold)
+
+    while True:
+        publish_root(args.level, node_addresses, args.threshold, master_pk,
+                     args.fanout, args.hedge_percentile)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Keep a local copy of a CA level's revocation list in sync with one of its
+nodes.
+
+Each node numbers its revocations with a monotonic sequence. The first
+sync pulls the whole list with the paginated CRLStream RPC; after that
+CRLSince only asks for entries past the last sequence number seen from
+that node, so only new revocations are transferred. Proofs are checked in
+one batch before they are stored. Entries are appended to
+crl_cache/level{n}/<node>.jsonl together with the node's cursor.
+"""
+import os
+import json
+import argparse
+
+import proto.ca_pb2 as pb
+from common.channels import get_stub
+from common.engine import get_engine
+from common.revocation import valid_revocations
+
+engine = get_engine()
+
+CACHE_DIR = "crl_cache"
+SYNC_TIMEOUT = 30  # seconds per CRLSince call / whole CRLStream
+
+
+class LocalCRL:
+    """Revoked serials learned from one node, and the node's cursor."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cursor = 0
+        self.entries = {}  # serial -> proof bytes (b"" if unproven)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    rec = json.loads(line)
+                    if "cursor" in rec:
+                        self.cursor = rec["cursor"]
+                    else:
+                        self.entries[rec["serial"]] = bytes.fromhex(rec["sig"])
+
+    def append(self, entries, cursor: int):
+        """Store new (serial, sig) entries and advance the cursor."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as f:
+            for serial, sig in entries:
+                self.entries[serial] = sig
+                f.write(json.dumps({"serial": serial, "sig": sig.hex()}) + "\n")
+            f.write(json.dumps({"cursor": cursor}) + "\n")
+        self.cursor = cursor
+
+    def is_revoked(self, serial: str, proven_only: bool = False) -> bool:
+        sig = self.entries.get(serial)
+        return sig is not None and (bool(sig) or not proven_only)
+
+
+def cache_path(level: int, addr: str) -> str:
+    return os.path.join(CACHE_DIR, f"level{level}", addr.replace(":", "_") + ".jsonl")
+
+
+def _fetch(addr: str, cursor: int, page_size: int):
+    """Yield (entries, cursor) batches from the node, starting after `cursor`."""
+    stub = get_stub(addr)
+    if cursor == 0:
+        for page in stub.CRLStream(pb.CRLPageRequest(page_size=page_size), timeout=SYNC_TIMEOUT):
+            yield page.entries, page.last_seq
+        return
+    more = True
+    while more:
+        delta = stub.CRLSince(pb.CRLSinceRequest(since_seq=cursor, limit=page_size),
+                              timeout=SYNC_TIMEOUT)
+        cursor, more = delta.last_seq, delta.more
+        yield delta.entries, cursor
+
+
+def sync_crl(level: int, addr: str, master_pk, page_size: int = 0) -> LocalCRL:
+    """Bring the local copy of `addr`'s CRL up to date. Invalid proofs are dropped."""
+    crl = LocalCRL(cache_path(level, addr))
+    start, fetched, rejected = crl.cursor, 0, 0
+    for entries, cursor in _fetch(addr, crl.cursor, page_size):
+        proven = [(e.serial, e.threshold_sig) for e in entries if e.threshold_sig]
+        valid = valid_revocations(proven, master_pk)
+        rejected += len(proven) - len(valid)
+        unproven = [(e.serial, b"") for e in entries
+                    if not e.threshold_sig and e.serial not in crl.entries]
+        crl.append(valid + unproven, cursor)
+        fetched += len(entries)
+    proven_total = sum(1 for sig in crl.entries.values() if sig)
+    print(f"{addr}: {fetched} new entries (seq {start} -> {crl.cursor}), {rejected} rejected; "
+          f"{len(crl.entries)} revoked, {proven_total} with proof")
+    return crl
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sync a CA level's revocation list")
+    ap.add_argument("--level", type=int, default=1, help="CA level whose nodes to sync from")
+    ap.add_argument("--node", type=str, default=None, help="Node address (default: first node of the level)")
+    ap.add_argument("--page-size", type=int, default=0, help="Entries per page (default: node's choice)")
+    args = ap.parse_args()
+
+    nodes = os.getenv(f"LEVEL{args.level}_NODES", "").split(",")
+    addr = args.node or nodes[0]
+    if not addr:
+        raise RuntimeError(f"Missing env LEVEL{args.level}_NODES")
+    with open(f"level{args.level}_master_pk.hex") as f:
+        master_pk = engine.g1_from_bytes(bytes.fromhex(f.read().strip()))
+    sync_crl(args.level, addr, master_pk, args.page_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Show how far the nodes of a CA level are with revocation gossip: per peer
+the cursor, entries / bytes pulled, proofs accepted and rejected, and
+whether the node has caught up with that peer.
+"""
+import os
+import argparse
+
+import proto.ca_pb2 as pb
+from common.channels import get_stub
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Print the gossip counters of a CA level's nodes")
+    ap.add_argument("--level", type=int, default=1, help="CA level whose nodes to ask")
+    args = ap.parse_args()
+
+    nodes = os.getenv(f"LEVEL{args.level}_NODES", "").split(",")
+    if nodes == [""]:
+        raise RuntimeError(f"Missing env LEVEL{args.level}_NODES")
+    for addr in nodes:
+        try:
+            st = get_stub(addr).GossipStats(pb.GossipStatsRequest(), timeout=3)
+        except Exception as e:
+            print(f"{addr}: unreachable ({e.code() if hasattr(e, 'code') else e})")
+            continue
+        if not st.peers:
+            print(f"{addr}: gossip off")
+            continue
+        print(f"{addr}: {st.rounds} rounds, every {st.interval:g}s")
+        for p in st.peers:
+            state = "caught up" if p.caught_up else "behind"
+            age = "never" if p.last_ok_age < 0 else f"{p.last_ok_age:.1f}s ago"
+            print(f"  <- {p.peer}: seq {p.cursor}, {p.entries} entries / {p.bytes} bytes, "
+                  f"{p.accepted} accepted, {p.rejected} rejected, {state}, last ok {age}"
+                  + (f", error: {p.error}" if p.error else ""))
+
+
+if __name__ == "__main__":
+    main()
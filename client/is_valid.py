@@ -1,59 +1,152 @@
 import argparse
 import os
 import re
-import hashlib
+import secrets
 from datetime import datetime
 
-import grpc
-from py_ecc.optimized_bls12_381 import pairing, G1, FQ, G2, multiply
-
 from common.cert import Certificate
-from common.util import bytes_to_g1, bytes_to_g2_jac
-from client.revoke import check_revocation_status, RevocationStatus
+from common.crlite import FilterCascade, filter_message, filter_path, load_signed
+from common.engine import get_engine
+from common.ocsp import OCSPStaple
+from client.revoke import check_revocation_statuses, RevocationStatus
 
+engine = get_engine()
 
-# Crypto helpers 
+# Size of the random multipliers used in batch verification
+BATCH_RAND_BITS = 64
 
-def hash_to_G2_point(msg: bytes):
-    h = int.from_bytes(hashlib.sha256(msg).digest(), "big") % G2[0].field_modulus
-    return multiply(G2, h)
 
+# Crypto helpers 
 
 def verify_cert_sig(cert: Certificate, sig_point, issuer_pk):
-    msg_point = hash_to_G2_point(cert.to_tbs())
-    lhs = pairing(sig_point, G1)
-    rhs = pairing(msg_point, issuer_pk)
-    return lhs == rhs
+    msg_point = engine.hash_to_g2(cert.to_tbs())
+    return engine.pairing_check([(sig_point, engine.G1_neg), (msg_point, issuer_pk)])
 
 
 def extract_bls_pubkey(cert: Certificate):
     if not cert.subject_pub_pem.startswith(b"BLS-PUBKEY:"):
         raise RuntimeError(f"Cert {cert.subject_cn} pubkey is not BLS")
     pk_bytes = cert.subject_pub_pem[len(b"BLS-PUBKEY:") :]
-    pt = bytes_to_g1(pk_bytes)
-    return (pt[0], pt[1], FQ.one())  # Jacobian form
+    return engine.g1_from_bytes(pk_bytes)
 
 
-def verify_chain(cert_list, trust_anchor_pk=None):
+def chain_links(cert_list, trust_anchor_pk=None):
+    """
+    Split a chain (leaf first) into (cert, issuer_pk, issuer_key, fail_msg)
+    links. issuer_key identifies the issuer pk so links can be grouped by it.
+    """
+    links = []
     for i in range(len(cert_list) - 1):
         child, parent = cert_list[i], cert_list[i + 1]
-        sig_point = bytes_to_g2_jac(child.signature)
-        issuer_pk = extract_bls_pubkey(parent)
-        if not verify_cert_sig(child, sig_point, issuer_pk):
-            return False, f"FAIL: {child.subject_cn} not signed by {parent.subject_cn}"
+        links.append((child, extract_bls_pubkey(parent), parent.subject_pub_pem,
+                      f"FAIL: {child.subject_cn} not signed by {parent.subject_cn}"))
 
     root = cert_list[-1]
-    sig_point = bytes_to_g2_jac(root.signature)
     if trust_anchor_pk:
-        if not verify_cert_sig(root, sig_point, trust_anchor_pk):
-            return False, "FAIL: Root not signed by trusted anchor"
+        links.append((root, trust_anchor_pk, b"TRUST-ANCHOR",
+                      "FAIL: Root not signed by trusted anchor"))
     else:
-        issuer_pk = extract_bls_pubkey(root)
-        if not verify_cert_sig(root, sig_point, issuer_pk):
-            return False, "FAIL: Root self-signature invalid"
+        links.append((root, extract_bls_pubkey(root), root.subject_pub_pem,
+                      "FAIL: Root self-signature invalid"))
+    return links
+
+
+def verify_links_batch(links) -> bool:
+    """
+    Check all links at once with a random linear combination:
+        e(sum r_j*sig_j, -G1) * prod_pk e(sum_{j: pk_j = pk} r_j*H(m_j), pk) == 1
+    That is one Miller loop per distinct issuer key plus one for the
+    signatures, and a single final exponentiation. A False result only
+    says that some link is bad; check per link to find out which.
+    """
+    sig_acc = None
+    msg_acc = {}
+    seen = set()
+    for cert, issuer_pk, issuer_key, _ in links:
+        # the same link shared by several chains is checked once; the TBS is
+        # part of the key so a signature copied onto another cert is not skipped
+        key = (cert.to_tbs(), cert.signature, issuer_key)
+        if key in seen:
+            continue
+        seen.add(key)
+        r = secrets.randbits(BATCH_RAND_BITS) | 1
+        sig = engine.g2_mul(engine.g2_from_bytes(cert.signature), r)
+        sig_acc = sig if sig_acc is None else engine.g2_add(sig_acc, sig)
+        msg = engine.g2_mul(engine.hash_to_g2(cert.to_tbs()), r)
+        if issuer_key in msg_acc:
+            msg = engine.g2_add(msg_acc[issuer_key][1], msg)
+        msg_acc[issuer_key] = (issuer_pk, msg)
+    pairs = [(sig_acc, engine.G1_neg)] + [(msg, pk) for pk, msg in msg_acc.values()]
+    return engine.pairing_check(pairs)
+
+
+def verify_chain(cert_list, trust_anchor_pk=None, batch=True):
+    links = chain_links(cert_list, trust_anchor_pk)
+    if batch and len(links) > 1 and verify_links_batch(links):
+        return True, "Full chain verified"
+
+    # per-link checks, to report exactly which link is bad
+    for cert, issuer_pk, _, fail_msg in links:
+        sig_point = engine.g2_from_bytes(cert.signature)
+        if not verify_cert_sig(cert, sig_point, issuer_pk):
+            return False, fail_msg
     return True, "Full chain verified"
 
 
+def verify_chains(chains, trust_anchor_pk=None):
+    """
+    Verify many chains with one batch check over all of their links.
+    Only if that fails is each chain checked on its own.
+    """
+    all_links = [l for chain in chains for l in chain_links(chain, trust_anchor_pk)]
+    if len(all_links) > 1 and verify_links_batch(all_links):
+        return [(True, "Full chain verified") for _ in chains]
+    return [verify_chain(chain, trust_anchor_pk) for chain in chains]
+
+
+def verify_staples_batch(stapled) -> bool:
+    """
+    Check stapled OCSP responses, given as (staple, issuer_pk, issuer_key),
+    the same way as verify_links_batch: one Miller loop per issuer key.
+    """
+    sig_acc = None
+    msg_acc = {}
+    for staple, issuer_pk, issuer_key in stapled:
+        r = secrets.randbits(BATCH_RAND_BITS) | 1
+        sig = engine.g2_mul(engine.g2_from_bytes(staple.signature), r)
+        sig_acc = sig if sig_acc is None else engine.g2_add(sig_acc, sig)
+        msg = engine.g2_mul(engine.hash_to_g2(staple.message()), r)
+        if issuer_key in msg_acc:
+            msg = engine.g2_add(msg_acc[issuer_key][1], msg)
+        msg_acc[issuer_key] = (issuer_pk, msg)
+    pairs = [(sig_acc, engine.G1_neg)] + [(msg, pk) for pk, msg in msg_acc.values()]
+    return engine.pairing_check(pairs)
+
+
+def stapled_statuses(certs, staples):
+    """
+    {serial: status} from the current staples for the non-root certs in
+    `certs`. A staple is checked against the key of the next cert in the
+    chain, so no network or key files are needed. If the batch check
+    fails, all staples are ignored.
+    """
+    by_serial = {s.serial: s for s in staples if s.is_current()}
+    stapled = []
+    for cert, issuer in zip(certs, certs[1:]):
+        staple = by_serial.get(cert.serial)
+        if staple is not None:
+            stapled.append((staple, extract_bls_pubkey(issuer), issuer.subject_pub_pem))
+    if not stapled:
+        return {}
+    try:
+        if verify_staples_batch(stapled):
+            return {staple.serial: staple.status for staple, _, _ in stapled}
+    except ValueError:
+        pass
+    print("Ignoring stapled OCSP responses: bad signature")
+    return {}
+
+
 def get_nodes_for_issuer(issuer_cn: str):
     m = re.search(r"Level(\d+)CA", issuer_cn)
     if not m:
@@ -66,24 +159,69 @@ def get_nodes_for_issuer(issuer_cn: str):
     pk_file = f"level{issuer_level}_master_pk.hex"
     with open(pk_file) as f:
         hexpk = f.read().strip()
-    master_pk = bytes_to_g1(bytes.fromhex(hexpk))
+    master_pk = engine.g1_from_bytes(bytes.fromhex(hexpk))
     return issuer_level, node_addresses, master_pk
 
 
-def is_valid_chain(cert_path: str, trust_anchor_pk, threshold: int = 2):
+_FILTERS = {}  # (directory, level) -> ((mtime, size), cascade or None)
+
+def load_revocation_filter(directory: str, level: int, master_pk):
     """
-    Full validator
+    Load the signed CRLite filter for `level` from `directory` and check its
+    threshold signature. The result is cached until the file changes.
+    Returns None if there is no usable filter, including one past its
+    next_update, so the caller falls back to OCSP.
+    """
+    key = (directory, level)
+    path = filter_path(directory, level)
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        stamp = None
+    if key not in _FILTERS or _FILTERS[key][0] != stamp:
+        cascade = None
+        if stamp is not None:
+            blob, sig = load_signed(path)
+            msg_point = engine.hash_to_g2(filter_message(blob))
+            if not engine.pairing_check([(engine.g2_from_bytes(sig), engine.G1_neg), (msg_point, master_pk)]):
+                print(f"Ignoring {path}: bad threshold signature")
+            else:
+                cascade = FilterCascade.from_bytes(blob)
+                if cascade.ca_level != level:
+                    print(f"Ignoring {path}: filter is for level {cascade.ca_level}")
+                    cascade = None
+        _FILTERS[key] = (stamp, cascade)
+    cascade = _FILTERS[key][1]
+    if cascade is not None and not cascade.is_current():
+        print(f"Ignoring {path}: outside its validity window, using OCSP")
+        return None
+    return cascade
+
+
+def is_valid_chain(cert_path: str, trust_anchor_pk, threshold: int = 2, batch: bool = True,
+                   filter_dir: str = None):
+    """
+    Full validator. Revocation is answered from stapled OCSP responses
+    first; with `filter_dir`, from the signed CRLite filters there for every
+    cert they cover; and from the nodes (OCSP) only for the rest.
     """
     with open(cert_path, "rb") as f:  
-        certs = Certificate.from_pem(f.read())
+        pem = f.read()
+    certs = Certificate.from_pem(pem)
     certs = certs if isinstance(certs, list) else [certs]
+    try:
+        staples = OCSPStaple.from_pem(pem)
+    except ValueError:
+        print("Ignoring malformed OCSP staples")
+        staples = []
 
     now = datetime.utcnow()
     overall_ok = True
     messages = []
 
     # 1. Signature checks
-    ok, msg = verify_chain(certs, trust_anchor_pk)
+    ok, msg = verify_chain(certs, trust_anchor_pk, batch=batch)
     if not ok:
         overall_ok = False
         messages.append(f"Signature check failed: {msg}")
@@ -99,18 +237,50 @@ def is_valid_chain(cert_path: str, trust_anchor_pk, threshold: int = 2):
         else:
             messages.append(f"{cert.subject_cn} validity ok")
 
-    # 3. Revocation (skip root)
+    # 3. Revocation (skip root): from staples, then from the filters where
+    # they cover the cert, otherwise one OCSPBatch per node for all the rest
+    stapled = stapled_statuses(certs, staples)
+    results = {}
+    ocsp, ocsp_pks = [], []
     for cert in certs[:-1]:
+        if cert.serial in stapled:
+            continue
         issuer_level, node_addresses, master_pk = get_nodes_for_issuer(cert.issuer_cn)
-        status, revoked_count, total = check_revocation_status(cert.serial, node_addresses, threshold)
-        if status == RevocationStatus.REVOKED:
+        cascade = load_revocation_filter(filter_dir, issuer_level, master_pk) if filter_dir else None
+        if cascade is not None and cascade.covers(cert.serial):
+            results[cert.serial] = cascade.is_revoked(cert.serial)
+        else:
+            ocsp.append((cert.serial, node_addresses))
+            ocsp_pks.append(master_pk)
+    statuses = dict(zip([serial for serial, _ in ocsp],
+                        check_revocation_statuses(ocsp, threshold, ocsp_pks)))
+
+    for cert in certs[:-1]:
+        if cert.serial in stapled:
+            if stapled[cert.serial] == "REVOKED":
+                overall_ok = False
+                messages.append(f"{cert.subject_cn} is revoked (stapled)")
+            else:
+                messages.append(f"{cert.subject_cn} not revoked (stapled)")
+            continue
+        if cert.serial in results:
+            if results[cert.serial]:
+                overall_ok = False
+                messages.append(f"{cert.subject_cn} is revoked (filter)")
+            else:
+                messages.append(f"{cert.subject_cn} not revoked (filter)")
+            continue
+        res = statuses[cert.serial]
+        took = f"decided in {res.latency * 1000:.0f} ms"
+        how = "Merkle proof" if res.proof else f"{res.revoked}/{res.total} nodes"
+        if res.status == RevocationStatus.REVOKED:
             overall_ok = False
-            messages.append(f"{cert.subject_cn} is revoked ({revoked_count}/{total} nodes)")
-        elif status == RevocationStatus.UNKNOWN:
+            messages.append(f"{cert.subject_cn} is revoked ({how}, {took})")
+        elif res.status == RevocationStatus.UNKNOWN:
             overall_ok = False
-            messages.append(f"Revocation status unknown for {cert.subject_cn}")
+            messages.append(f"Revocation status unknown for {cert.subject_cn} ({took})")
         else:
-            messages.append(f"{cert.subject_cn} not revoked ({revoked_count}/{total} nodes)")
+            messages.append(f"{cert.subject_cn} not revoked ({how}, {took})")
 
     summary = "Cert is valid" if overall_ok else "Cert is INVALID"
     return overall_ok, messages, summary
@@ -118,31 +288,46 @@ def is_valid_chain(cert_path: str, trust_anchor_pk, threshold: int = 2):
 
 def main():
     ap = argparse.ArgumentParser(description="Validate a certificate chain fully")
-    ap.add_argument("cert_path", help="Path to PEM file containing cert + chain")
+    ap.add_argument("cert_path", nargs="+", help="Path(s) to PEM file containing cert + chain")
     ap.add_argument("--threshold", type=int, default=2, help="Revocation threshold (t in t-of-n)")
     ap.add_argument("--trust-anchor", required=True, help="Path to master_pk.hex of trusted root")
     ap.add_argument("--verify-only", action="store_true",
                     help="Only verify signatures (skip revocation checks)")
+    ap.add_argument("--no-batch", action="store_true",
+                    help="Check every chain link with its own pairing check")
+    ap.add_argument("--filter", default=None, metavar="DIR",
+                    help="Answer revocation from the signed CRLite filters in DIR "
+                         "(see client.build_crlite); OCSP only for certs they do not cover")
     args = ap.parse_args()
 
     with open(args.trust_anchor) as f:
         hexpk = f.read().strip()
-    trust_anchor_pk = bytes_to_g1(bytes.fromhex(hexpk))
+    trust_anchor_pk = engine.g1_from_bytes(bytes.fromhex(hexpk))
 
     # Fast path- only verify signatures
     if args.verify_only:
-        with open(args.cert_path, "rb") as f:
-            certs = Certificate.from_pem(f.read())
-        certs = certs if isinstance(certs, list) else [certs]
-        ok, msg = verify_chain(certs, trust_anchor_pk)
-        print(msg)
+        chains = []
+        for path in args.cert_path:
+            with open(path, "rb") as f:
+                certs = Certificate.from_pem(f.read())
+            chains.append(certs if isinstance(certs, list) else [certs])
+        if args.no_batch:
+            results = [verify_chain(c, trust_anchor_pk, batch=False) for c in chains]
+        else:
+            results = verify_chains(chains, trust_anchor_pk)
+        for path, (ok, msg) in zip(args.cert_path, results):
+            print(msg if len(args.cert_path) == 1 else f"{path}: {msg}")
         return
 
     # Full validation
-    ok, messages, summary = is_valid_chain(args.cert_path, trust_anchor_pk, args.threshold)
-    print("\n".join(messages))
-    print("----")
-    print(summary)
+    for path in args.cert_path:
+        ok, messages, summary = is_valid_chain(path, trust_anchor_pk, args.threshold,
+                                               batch=not args.no_batch, filter_dir=args.filter)
+        if len(args.cert_path) > 1:
+            print(f"== {path}")
+        print("\n".join(messages))
+        print("----")
+        print(summary)
 
 
 if __name__ == "__main__":
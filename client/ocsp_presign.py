@@ -0,0 +1,120 @@
+"""
+Pre-sign OCSP responses for every certificate a CA level issued.
+
+The current status of each serial is taken from the level's nodes (OCSP
+quorum), then the nodes threshold-sign
+    OCSP:<serial>:<status>:<thisUpdate>:<nextUpdate>
+in batches of SignOCSPBatchPartial calls. Each node refuses to sign a
+status that disagrees with its own CRL. The aggregated responses are
+written to <out-dir>/level{n}/<serial>.ocsp, where `client.staple` picks
+them up. With --interval the responses are re-signed periodically.
+"""
+import os
+import time
+import argparse
+
+import proto.ca_pb2 as pb
+from common.channels import get_stub
+from common.engine import get_engine
+from common.fanout import collect_verified_partials, latency_tracker, FANOUT_STRATEGIES, HEDGE_PERCENTILE
+from common.ocsp import OCSPStaple, now, MAX_VALIDITY
+from common.shares import load_share_pks, verify_partial_batches, verify_same_key
+from common.util import precompute_lagrange
+from client.build_crlite import issued_serials
+from client.revoke import check_revocation_statuses, RevocationStatus
+from client.sign import aggregate_threshold, PARTIAL_TIMEOUT
+
+engine = get_engine()
+
+BATCH_SIZE = 500            # responses per SignOCSPBatchPartial call
+DEFAULT_VALIDITY = 24 * 3600
+
+
+def staple_path(directory: str, ca_level: int, serial: str) -> str:
+    return f"{directory}/level{ca_level}/{serial}.ocsp"
+
+
+def sign_staples(staples, level: int, node_addresses, threshold: int, master_pk,
+                 strategy: str = "hedged", hedge_percentile: float = HEDGE_PERCENTILE):
+    """Threshold-sign a batch of unsigned OCSPStaples in place."""
+    msgs = [s.message() for s in staples]
+    req = pb.OCSPSignBatchReq(items=[
+        pb.OCSPStatusItem(serial=s.serial, status=pb.OCSPResponse.Status.Value(s.status),
+                          this_update=s.this_update, next_update=s.next_update)
+        for s in staples])
+    share_pks = load_share_pks(level)
+
+    def invoke(addr):
+        return get_stub(addr).SignOCSPBatchPartial.future(req, timeout=PARTIAL_TIMEOUT * len(staples))
+
+    node_parts = collect_verified_partials(node_addresses, invoke, threshold,
+                                           lambda ps: verify_partial_batches(msgs, ps, share_pks),
+                                           strategy, latency_tracker("SignOCSPBatchPartial"),
+                                           hedge_percentile, field="partial_sigs")
+    if len(node_parts) < threshold:
+        raise RuntimeError("INSUFFICIENT PARTIALS for OCSP batch")
+    aggs = [aggregate_threshold([(i, sigs[j]) for i, sigs in node_parts]) for j in range(len(staples))]
+    if not verify_same_key([engine.hash_to_g2(m) for m in msgs], aggs, master_pk):
+        raise RuntimeError("aggregated OCSP signatures do not verify")
+    for s, agg in zip(staples, aggs):
+        s.signature = engine.g2_to_bytes(agg)
+
+
+def presign(level: int, certs_dir: str, out_dir: str, node_addresses, threshold: int, master_pk,
+            validity: int = DEFAULT_VALIDITY, strategy: str = "hedged",
+            hedge_percentile: float = HEDGE_PERCENTILE) -> int:
+    """Sign fresh responses for every serial issued by `level`; returns how many were written."""
+    serials = sorted(issued_serials(certs_dir, level))
+    results = check_revocation_statuses([(s, node_addresses) for s in serials], threshold)
+    this_update = now()
+    staples = []
+    for serial, res in zip(serials, results):
+        if res.status == RevocationStatus.UNKNOWN:
+            print(f"Skipping {serial}: status unknown")
+            continue
+        staples.append(OCSPStaple(serial, res.status.value, this_update, this_update + validity))
+
+    os.makedirs(f"{out_dir}/level{level}", exist_ok=True)
+    for i in range(0, len(staples), BATCH_SIZE):
+        batch = staples[i:i + BATCH_SIZE]
+        sign_staples(batch, level, node_addresses, threshold, master_pk, strategy, hedge_percentile)
+        for s in batch:
+            with open(staple_path(out_dir, level, s.serial), "wb") as f:
+                f.write(s.to_pem())
+    revoked = sum(s.status == "REVOKED" for s in staples)
+    print(f"Level {level}: signed {len(staples)} OCSP responses ({revoked} revoked), "
+          f"valid until {this_update + validity}")
+    return len(staples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Threshold-sign OCSP responses for a CA level")
+    ap.add_argument("--level", type=int, default=1, help="CA level whose certificates to cover")
+    ap.add_argument("--certs-dir", default="certs", help="Where to find issued certificates")
+    ap.add_argument("--out-dir", default="ocsp", help="Where to write level{n}/<serial>.ocsp")
+    ap.add_argument("--validity", type=int, default=DEFAULT_VALIDITY,
+                    help=f"Seconds each response stays valid (at most {MAX_VALIDITY})")
+    ap.add_argument("--interval", type=int, default=0,
+                    help="Re-sign every N seconds (0: sign once and exit)")
+    ap.add_argument("--threshold", type=int, default=int(os.getenv("THRESHOLD", "2")))
+    ap.add_argument("--fanout", choices=FANOUT_STRATEGIES, default="hedged")
+    ap.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE)
+    args = ap.parse_args()
+
+    node_addresses = os.getenv(f"LEVEL{args.level}_NODES", "").split(",")
+    if node_addresses == [""]:
+        raise RuntimeError(f"Missing env LEVEL{args.level}_NODES")
+    with open(f"level{args.level}_master_pk.hex") as f:
+        master_pk = engine.g1_from_bytes(bytes.fromhex(f.read().strip()))
+    precompute_lagrange(len(node_addresses), args.threshold)
+
+    while True:
+        presign(args.level, args.certs_dir, args.out_dir, node_addresses, args.threshold, master_pk,
+                args.validity, args.fanout, args.hedge_percentile)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
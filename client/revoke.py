@@ -1,24 +1,32 @@
 import os
+import random
 import uuid
-import grpc
 import hashlib
+import time
 import argparse
-from typing import List, Tuple
+from typing import List, Tuple, NamedTuple
 from enum import Enum
 
 import proto.ca_pb2 as pb
-import proto.ca_pb2_grpc as pbg
-from common.util import (
-    hash_to_G2_point,
-    g2_to_bytes_jac,
-    bytes_to_g2_jac,
-    lagrange_coeff,
-    bytes_to_g1,
-)
-from py_ecc.optimized_bls12_381 import (
-    G1, multiply, add, pairing
+from common.util import precompute_lagrange
+from common.engine import get_engine
+from common.channels import get_stub
+from common.shares import load_share_pks, verify_partials, aggregate_partials
+from common.fanout import (
+    FanOut, collect_verified_partials, latency_tracker, FANOUT_STRATEGIES, HEDGE_PERCENTILE
 )
 from common.cert import Certificate
+from common.merkle import MerkleTree, root_message, verify_proof, is_fresh
+from common.revocation import batch_message
+
+engine = get_engine()
+
+PARTIAL_TIMEOUT = 3  # seconds per SignRevokePartial call
+OCSP_TIMEOUT = 2     # seconds per OCSPBatch call
+REVOKE_BATCH_SIZE = 10000  # serials per batch revocation signature
+# Nodes a revocation proof is pushed to; the nodes gossip it to the rest
+# (0 = push to every node)
+REVOCATION_PUSH = int(os.getenv("REVOCATION_PUSH", "2"))
 
 
 class RevocationStatus(Enum):
@@ -27,6 +35,14 @@ class RevocationStatus(Enum):
     UNKNOWN = "UNKNOWN"
 
 
+class OCSPResult(NamedTuple):
+    status: RevocationStatus
+    revoked: int      # REVOKED answers seen when the outcome was decided
+    total: int        # nodes asked
+    latency: float    # seconds until the outcome was decided
+    proof: bool = False  # decided by a Merkle proof against a signed CRL root
+
+
 def detect_issuer_nodes_and_pk(cert_path: str):
     """Given a PEM cert, detect which CA group issued it and load master_pk + nodes."""
     with open(cert_path, "rb") as f:
@@ -50,115 +66,226 @@ def detect_issuer_nodes_and_pk(cert_path: str):
     pk_file = f"level{issuer_level}_master_pk.hex"
     with open(pk_file) as f:
         hexpk = f.read().strip()
-    master_pk = bytes_to_g1(bytes.fromhex(hexpk))
+    master_pk = engine.g1_from_bytes(bytes.fromhex(hexpk))
 
     return issuer_level, node_addresses, master_pk
 
-def request_revoke_partials(serial: str, node_addresses: List[str], threshold: int) -> List[Tuple[int, bytes]]:
+def request_revoke_partials(serial: str, node_addresses: List[str], threshold: int,
+                            strategy: str = "hedged",
+                            hedge_percentile: float = HEDGE_PERCENTILE,
+                            share_pks=None) -> List[Tuple[int, bytes]]:
     """
-    Request partial revocation sigs
+    Request partial revocation sigs. With the nodes' share keys, invalid
+    partials are dropped and spare nodes asked instead.
     """
     msg = f"REVOKE:{serial}".encode()
     print("Revoke digest:", hashlib.sha256(msg).hexdigest())
-    parts = []
-    for addr in node_addresses:
-        print(f"→ contacting {addr} for revocation")
-        ch = grpc.insecure_channel(addr)
-        stub = pbg.CANodeStub(ch)
-        try:
-            resp = stub.SignRevokePartial(pb.RevokeRequest(serial=serial), timeout=3)
-            print(f"  got response from {addr}: ok={resp.ok}, len={len(resp.partial_sig)}")
-            if resp.ok:
-                parts.append((resp.node_index, resp.partial_sig))
-        except Exception as e:
-            print(f"  node failed: {addr}, error={e}")
-        if len(parts) >= threshold:
-            break
-    return parts
+    req = pb.RevokeRequest(serial=serial)
+
+    def invoke(addr):
+        return get_stub(addr).SignRevokePartial.future(req, timeout=PARTIAL_TIMEOUT)
+
+    return collect_verified_partials(node_addresses, invoke, threshold,
+                                     lambda parts: verify_partials(msg, parts, share_pks),
+                                     strategy, latency_tracker("SignRevokePartial"),
+                                     hedge_percentile)
+
+def request_revoke_batch_partials(tree: MerkleTree, node_addresses: List[str], threshold: int,
+                                  strategy: str = "hedged",
+                                  hedge_percentile: float = HEDGE_PERCENTILE,
+                                  share_pks=None) -> List[Tuple[int, bytes]]:
+    """
+    Request partial signatures on the commitment to a batch of serials
+    (the Merkle root over them); invalid partials are replaced as above.
+    """
+    msg = batch_message(len(tree), tree.root)
+    print(f"Revoke batch of {len(tree)}, root:", tree.root.hex())
+    req = pb.RevokeBatchRequest(serials=tree.leaves)
+
+    def invoke(addr):
+        return get_stub(addr).SignRevokeBatchPartial.future(req, timeout=PARTIAL_TIMEOUT)
+
+    return collect_verified_partials(node_addresses, invoke, threshold,
+                                     lambda parts: verify_partials(msg, parts, share_pks),
+                                     strategy, latency_tracker("SignRevokeBatchPartial"),
+                                     hedge_percentile)
 
 def aggregate_threshold(partials: List[Tuple[int, bytes]]):
     idx = [i for (i, _) in partials]
     print("Indices used for interpolation:", idx)
-    lambdas = lagrange_coeff(idx)
-    g2_pts = [bytes_to_g2_jac(sig_b) for (_, sig_b) in partials]
-    agg = None
-    for lam, P in zip(lambdas, g2_pts):
-        scaled = multiply(P, lam)
-        agg = scaled if agg is None else add(agg, scaled)
-    return agg
+    return aggregate_partials(partials)
 
 def verify_revoke(serial: str, agg_sig_point, master_pk) -> bool:
     """
     Verify aggregated revoke proof
     """
     msg = f"REVOKE:{serial}".encode()
-    msg_point = hash_to_G2_point(msg)
-    lhs = pairing(agg_sig_point, G1)
-    rhs = pairing(msg_point, master_pk)
-    return lhs == rhs
+    msg_point = engine.hash_to_g2(msg)
+    return engine.pairing_check([(agg_sig_point, engine.G1_neg), (msg_point, master_pk)])
+
+
+def push_proof(name: str, invoke, node_addresses: List[str], count: int = REVOCATION_PUSH) -> int:
+    """
+    Hand a proof to `count` nodes at once (all if 0), in random order; a
+    node that fails is replaced by one not tried yet. Gossip between the
+    nodes spreads it to the others. Returns how many nodes accepted it.
+    """
+    order = random.sample(node_addresses, len(node_addresses))
+    want = min(count or len(order), len(order))
+    acked = 0
+    with FanOut() as fo:
+        while acked < want and (fo.pending or order):
+            while order and fo.pending < want - acked:
+                addr = order.pop()
+                fo.submit(addr, invoke(addr))
+            addr, resp, err = fo.next()
+            if err is None and resp.ok:
+                acked += 1
+            print(f"{addr} {name}:", *((resp.ok, resp.msg) if err is None else ("failed:", err)))
+    return acked
 
 
 def broadcast_revocation(serial: str, agg_sig_point, node_addresses: List[str]):
     """
     Broadcast aggregated proof
     """
-    sig_bytes = g2_to_bytes_jac(agg_sig_point)
-    for addr in node_addresses: 
-        ch = grpc.insecure_channel(addr)
-        stub = pbg.CANodeStub(ch)
-        try:
-            resp = stub.ApplyRevocation(pb.RevocationProof(
-                serial=serial,
-                threshold_sig=sig_bytes
-            ), timeout=3)
-            print(f"{addr} ApplyRevocation:", resp.ok, resp.msg)
-        except Exception as e:
-            print(f"{addr} ApplyRevocation failed:", e)
+    req = pb.RevocationProof(serial=serial, threshold_sig=engine.g2_to_bytes(agg_sig_point))
+    return push_proof("ApplyRevocation", lambda addr: get_stub(addr).ApplyRevocation.future(req, timeout=3),
+                      node_addresses)
 
 
-def check_revocation_status(serial: str, node_addresses: List[str], threshold: int):
+def broadcast_revocation_batch(tree: MerkleTree, agg_sig_point, node_addresses: List[str]):
+    """
+    Broadcast one aggregated proof for a whole batch
+    """
+    req = pb.RevocationBatchProof(serials=tree.leaves, threshold_sig=engine.g2_to_bytes(agg_sig_point))
+    return push_proof("ApplyRevocationBatch",
+                      lambda addr: get_stub(addr).ApplyRevocationBatch.future(req, timeout=10),
+                      node_addresses)
+
+
+def _proven_status(root, proof, serial: str, master_pk, checked_roots):
+    """
+    True/False if `proof` shows `serial` is / is not in a fresh signed CRL
+    root, None if there is no usable proof. Each distinct root costs one
+    pairing check per call of check_revocation_statuses.
+    """
+    key = (root.SerializeToString(), engine.g1_to_bytes(master_pk))
+    if key not in checked_roots:
+        ok = is_fresh(root.epoch)
+        if ok:
+            try:
+                sig = engine.g2_from_bytes(root.threshold_sig)
+                msg_point = engine.hash_to_g2(root_message(root.epoch, root.size, root.root))
+                ok = engine.pairing_check([(sig, engine.G1_neg), (msg_point, master_pk)])
+            except ValueError:
+                ok = False
+        checked_roots[key] = ok
+    if not checked_roots[key]:
+        return None
+    try:
+        return verify_proof(serial, [(l.serial, l.index, l.path) for l in proof.leaves], root.size, root.root)
+    except ValueError:
+        return None
+
+
+def check_revocation_statuses(queries, threshold: int, master_pks=None) -> List[OCSPResult]:
+    """
+    OCSP status for many serials: queries is [(serial, node_addresses)].
+    Every node gets a single OCSPBatch call with all serials it is asked
+    about, and all nodes are asked at once. A serial is decided as soon as
+    `threshold` nodes say REVOKED, or enough have answered otherwise that
+    `threshold` can no longer be reached; once every serial is decided the
+    calls still in flight are cancelled. Returns results in query order.
+
+    With master_pks (the issuing level's key for each query), a single
+    answer decides a serial if it carries a valid Merkle proof against a
+    fresh signed CRL root: an inclusion proof means REVOKED, a
+    non-inclusion proof means GOOD unless that node has since seen a
+    revocation.
+    """
+    by_node = {}
+    for q, (serial, node_addresses) in enumerate(queries):
+        for addr in node_addresses:
+            by_node.setdefault(addr, []).append((q, serial))
+
+    revoked = [0] * len(queries)
+    responded = [0] * len(queries)
+    pending = [len(node_addresses) for _, node_addresses in queries]
+    results = [None] * len(queries)
+    checked_roots = {}
+    start = time.monotonic()
+
+    def decide(q):
+        if results[q] is not None:
+            return
+        if revoked[q] >= threshold:
+            status = RevocationStatus.REVOKED
+        elif responded[q] and revoked[q] + pending[q] < threshold:
+            status = RevocationStatus.GOOD
+        elif not pending[q]:
+            status = RevocationStatus.GOOD if responded[q] else RevocationStatus.UNKNOWN
+        else:
+            return
+        results[q] = OCSPResult(status, revoked[q], len(queries[q][1]), time.monotonic() - start)
+
+    with FanOut() as fo:
+        for addr, items in by_node.items():
+            req = pb.OCSPBatchRequest(serials=[s for _, s in items])
+            fo.submit(addr, get_stub(addr).OCSPBatch.future(req, timeout=OCSP_TIMEOUT))
+        while fo.pending and None in results:
+            addr, resp, err = fo.next()
+            items = by_node[addr]
+            ok = err is None and len(resp.statuses) == len(items)
+            proofs = ok and master_pks is not None and resp.HasField("root") and len(resp.proofs) == len(items)
+            for i, (q, serial) in enumerate(items):
+                pending[q] -= 1
+                if ok:
+                    responded[q] += 1
+                    if resp.statuses[i] == pb.OCSPResponse.REVOKED:
+                        revoked[q] += 1
+                if proofs and results[q] is None and master_pks[q] is not None:
+                    proven = _proven_status(resp.root, resp.proofs[i], serial, master_pks[q], checked_roots)
+                    if proven is True or (proven is False and resp.statuses[i] == pb.OCSPResponse.GOOD):
+                        status = RevocationStatus.REVOKED if proven else RevocationStatus.GOOD
+                        results[q] = OCSPResult(status, revoked[q], len(queries[q][1]),
+                                                time.monotonic() - start, proof=True)
+                decide(q)
+    for q in range(len(queries)):
+        decide(q)  # nodes nobody was asked about
+    return results
+
+
+def check_revocation_status(serial: str, node_addresses: List[str], threshold: int,
+                            master_pk=None) -> OCSPResult:
     """
     OCSP Status
     """
-    revoked_count, total = 0, len(node_addresses)   # total = all nodes
-    responded = 0
-
-    for addr in node_addresses:
-        ch = grpc.insecure_channel(addr)
-        stub = pbg.CANodeStub(ch)
-        try:
-            ocsp = stub.OCSP(pb.OCSPRequest(serial=serial), timeout=2)
-            responded += 1
-            if ocsp.status == pb.OCSPResponse.REVOKED:
-                revoked_count += 1
-        except Exception:
-            pass
-
-    if responded == 0:
-        return RevocationStatus.UNKNOWN, revoked_count, total
-    if revoked_count >= threshold:
-        return RevocationStatus.REVOKED, revoked_count, total
-    return RevocationStatus.GOOD, revoked_count, total
+    return check_revocation_statuses([(serial, node_addresses)], threshold,
+                                     None if master_pk is None else [master_pk])[0]
     
 
-def perform_revocation(cert_path: str, threshold: int = 2):
+def perform_revocation(cert_path: str, threshold: int = 2, strategy: str = "hedged",
+                       hedge_percentile: float = HEDGE_PERCENTILE):
     """
     High-level helper
     Perform threshold revocation of the given cert. Returns (ok, msg).
     """
     issuer_level, node_addresses, master_pk = detect_issuer_nodes_and_pk(cert_path)
+    precompute_lagrange(len(node_addresses), threshold)
 
     certs = Certificate.from_pem(open(cert_path, "rb").read())
     cert = certs[0] if isinstance(certs, list) else certs
     serial = cert.serial
 
-    parts = request_revoke_partials(serial, node_addresses, threshold)
+    parts = request_revoke_partials(serial, node_addresses, threshold, strategy, hedge_percentile,
+                                    load_share_pks(issuer_level))
     if len(parts) < threshold:
         return False, "INSUFFICIENT PARTIALS for revocation"
 
     agg_sig_point = aggregate_threshold(parts)
     print("=== Threshold Revocation Proof ===")
-    print(g2_to_bytes_jac(agg_sig_point).hex())
+    print(engine.g2_to_bytes(agg_sig_point).hex())
 
     ok = verify_revoke(serial, agg_sig_point, master_pk)
     print("verify:", ok)
@@ -166,19 +293,70 @@ def perform_revocation(cert_path: str, threshold: int = 2):
         return False, "Invalid aggregated revocation proof"
 
     broadcast_revocation(serial, agg_sig_point, node_addresses)
-    status_enum, revoked_count, total = check_revocation_status(serial, node_addresses, threshold)
-    return True, f"Revocation completed, final status: {status_enum.value} ({revoked_count}/{total} nodes)"
+    res = check_revocation_status(serial, node_addresses, threshold)
+    return True, (f"Revocation completed, final status: {res.status.value} "
+                  f"({res.revoked}/{res.total} nodes, decided in {res.latency * 1000:.0f} ms)")
+
+
+def perform_batch_revocation(cert_paths: List[str], threshold: int = 2, strategy: str = "hedged",
+                             hedge_percentile: float = HEDGE_PERCENTILE):
+    """
+    Revoke the leaf certs of many PEM files with one threshold signature
+    per issuing level (per REVOKE_BATCH_SIZE serials). Returns (ok, msg).
+    """
+    by_level = {}
+    for path in cert_paths:
+        issuer_level, node_addresses, master_pk = detect_issuer_nodes_and_pk(path)
+        certs = Certificate.from_pem(open(path, "rb").read())
+        cert = certs[0] if isinstance(certs, list) else certs
+        by_level.setdefault(issuer_level, (node_addresses, master_pk, []))[2].append(cert.serial)
+
+    queries = []
+    for level, (node_addresses, master_pk, serials) in sorted(by_level.items()):
+        precompute_lagrange(len(node_addresses), threshold)
+        share_pks = load_share_pks(level)
+        serials = sorted(set(serials))
+        for i in range(0, len(serials), REVOKE_BATCH_SIZE):
+            tree = MerkleTree(serials[i:i + REVOKE_BATCH_SIZE])
+            parts = request_revoke_batch_partials(tree, node_addresses, threshold, strategy,
+                                                  hedge_percentile, share_pks)
+            if len(parts) < threshold:
+                return False, "INSUFFICIENT PARTIALS for batch revocation"
+            agg_sig_point = aggregate_threshold(parts)
+            msg_point = engine.hash_to_g2(batch_message(len(tree), tree.root))
+            ok = engine.pairing_check([(agg_sig_point, engine.G1_neg), (msg_point, master_pk)])
+            print("verify:", ok)
+            if not ok:
+                return False, "Invalid aggregated batch revocation proof"
+            broadcast_revocation_batch(tree, agg_sig_point, node_addresses)
+        queries += [(serial, node_addresses) for serial in serials]
+
+    results = check_revocation_statuses(queries, threshold)
+    revoked = sum(res.status == RevocationStatus.REVOKED for res in results)
+    return revoked == len(results), f"Batch revocation completed: {revoked}/{len(results)} serials REVOKED"
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--revoke", help="Path to PEM file of cert to revoke")
+    ap.add_argument("--revoke-batch", nargs="+", metavar="PEM",
+                    help="Revoke the certs in all these PEM files with one threshold signature per level")
     ap.add_argument("--ocsp", help="Path to PEM file of cert to query status")
     ap.add_argument("--threshold", type=int, default=int(os.getenv("THRESHOLD", "2")))
+    ap.add_argument("--fanout", choices=FANOUT_STRATEGIES, default="hedged",
+                    help="How to contact the nodes for partial revocation signatures")
+    ap.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE,
+                    help="Ask a spare node once a call is slower than this latency percentile")
     args = ap.parse_args()
 
     if args.revoke:
-        ok, msg = perform_revocation(args.revoke, args.threshold)
+        ok, msg = perform_revocation(args.revoke, args.threshold, args.fanout, args.hedge_percentile)
+        print(msg)
+        return
+
+    if args.revoke_batch:
+        ok, msg = perform_batch_revocation(args.revoke_batch, args.threshold, args.fanout,
+                                           args.hedge_percentile)
         print(msg)
         return
 
@@ -186,8 +364,10 @@ def main():
         issuer_level, node_addresses, master_pk = detect_issuer_nodes_and_pk(args.ocsp)
         certs = Certificate.from_pem(open(args.ocsp, "rb").read())
         cert = certs[0] if isinstance(certs, list) else certs
-        status, revoked_count, total = check_revocation_status(cert.serial, node_addresses, args.threshold)
-        print(f"OCSP status for {cert.subject_cn}: {status.value} ({revoked_count}/{total} nodes)")
+        res = check_revocation_status(cert.serial, node_addresses, args.threshold, master_pk)
+        how = "Merkle proof" if res.proof else f"{res.revoked}/{res.total} nodes"
+        print(f"OCSP status for {cert.subject_cn}: {res.status.value} "
+              f"({how}, decided in {res.latency * 1000:.0f} ms)")
 
         return
 
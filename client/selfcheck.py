@@ -0,0 +1,58 @@
+"""
+Regression checks for batched chain verification and CRLite filter
+coverage, run with
+    python -m client.selfcheck
+Keys are generated locally, so no nodes or key files are needed.
+"""
+import sys
+import uuid
+import secrets
+from datetime import datetime, timedelta
+
+from common.cert import Certificate
+from common.crlite import FilterCascade
+from common.engine import get_engine
+from common.util import R
+from client.is_valid import verify_chain, verify_chains
+
+engine = get_engine()
+
+
+def _signed(cn: str, issuer_cn: str, sk: int, pub: bytes, is_ca: bool) -> Certificate:
+    now = datetime.utcnow()
+    cert = Certificate(serial=cn, subject_cn=cn, issuer_cn=issuer_cn, not_before=now,
+                       not_after=now + timedelta(days=1), subject_pub_pem=pub, is_ca=is_ca)
+    cert.signature = engine.g2_to_bytes(engine.g2_mul(engine.hash_to_g2(cert.to_tbs()), sk))
+    return cert
+
+
+def transplant_check() -> bool:
+    """A signature copied from one chain onto another cert must fail the batch check."""
+    sk = secrets.randbelow(R - 1) + 1
+    pub = b"BLS-PUBKEY:" + engine.g1_to_bytes(engine.g1_mul(engine.G1, sk))
+    root = _signed("Level1CA", "Level1CA", sk, pub, True)
+    leaf = _signed("leafA", "Level1CA", sk, b"EE-KEY-A", False)
+    forged = _signed("mallory", "Level1CA", sk, b"EE-KEY-M", False)
+    forged.signature = leaf.signature
+
+    alone = verify_chain([forged, root], batch=False)[0]
+    batched = verify_chains([[leaf, root], [forged, root]])
+    print(f"forged chain alone: {alone}, in a batch: {[ok for ok, _ in batched]}")
+    return not alone and batched[0][0] and not batched[1][0]
+
+
+def filter_coverage_check() -> bool:
+    """A filter answers exactly for the serials it was built from and covers no others."""
+    revoked = {str(uuid.uuid4()) for _ in range(3)}
+    valid = {str(uuid.uuid4()) for _ in range(5)}
+    cascade = FilterCascade.from_bytes(FilterCascade.build(revoked, valid, 1, 0, 1).to_bytes())
+    exact = all(cascade.covers(s) and cascade.is_revoked(s) == (s in revoked) for s in revoked | valid)
+    outside = sum(cascade.covers(str(uuid.uuid4())) for _ in range(1000))
+    print(f"filter exact on its build set: {exact}, unknown serials covered: {outside}/1000")
+    return exact and outside == 0
+
+
+if __name__ == "__main__":
+    ok = all([transplant_check(), filter_coverage_check()])
+    print("self-check passed:", ok)
+    sys.exit(0 if ok else 1)
@@ -1,73 +1,94 @@
-import os, uuid, grpc, hashlib, argparse
+import os, uuid, hashlib, argparse
 from datetime import datetime, timedelta
 from typing import List, Tuple
 
 
 from common.cert import Certificate
 import proto.ca_pb2 as pb
-import proto.ca_pb2_grpc as pbg
-from client.is_valid import verify_cert_sig
-from common.util import bytes_to_g1, bytes_to_g2_jac, g2_to_bytes_jac, gen_rsa_keypair
+from client.is_valid import verify_cert_sig, extract_bls_pubkey
+from common.util import gen_rsa_keypair, precompute_lagrange
+from common.engine import get_engine
+from common.channels import get_stub
+from common.shares import load_share_pks, verify_partials, verify_partial_batches, aggregate_partials
+from common.fanout import collect_verified_partials, latency_tracker, FANOUT_STRATEGIES, HEDGE_PERCENTILE
 
 
-from py_ecc.optimized_bls12_381 import (
-    curve_order as R,
-    G1, G2, multiply, add, pairing, normalize, FQ
-)
+from py_ecc.optimized_bls12_381 import curve_order as R
+
+engine = get_engine()
+
+PARTIAL_TIMEOUT = 3  # seconds per SignPartial call
+ISSUE_TIMEOUT = 10   # seconds per IssueCertificate call to a coordinator
+BATCH_SIZE = 1000    # TBS per SignPartialBatch call, the most a node accepts
 
 def H_to_scalar(seed: bytes) -> int:
     return int.from_bytes(hashlib.sha256(seed).digest(), "big") % R
 
-def hash_to_G2_point(msg: bytes):
-    h = int.from_bytes(hashlib.sha256(msg).digest(), "big") % R
-    return multiply(G2, h)
-
-def lagrange_coeff(indices: List[int]) -> List[int]:
+def aggregate_threshold(partials: List[Tuple[int, bytes]]):
     """
-    Lagrange interpolation
+    threshold aggreagation function that combines partials to certificate
     """
-    coeffs = []
-    for j, xj in enumerate(indices):
-        num, den = 1, 1
-        for m, xm in enumerate(indices):
-            if m == j: 
-                continue
-            num = (num * (-xm % R)) % R
-            den = (den * ((xj - xm) % R)) % R
-        coeffs.append((num * pow(den, -1, R)) % R)
-    return coeffs
+    return aggregate_partials(partials)
 
-def aggregate_threshold(partials: List[Tuple[int, bytes]]):
+def request_partials(tbs: bytes, node_addresses: List[str], threshold:int,
+                     strategy: str = "hedged",
+                     hedge_percentile: float = HEDGE_PERCENTILE,
+                     share_pks=None) -> List[Tuple[int,bytes]]:
     """
-    threshold aggreagation function that combines partials to certificate
+    Get `threshold` partials on `tbs`. With the nodes' share keys, invalid
+    partials are dropped and spare nodes asked instead.
     """
-    idx = [i for (i, _) in partials]
-    lambdas = lagrange_coeff(idx)
-    g2_pts = [bytes_to_g2_jac(sig_b) for (_, sig_b) in partials]
-    agg = None
-    for lam, P in zip(lambdas, g2_pts):
-        scaled = multiply(P, lam)
-        agg = scaled if agg is None else add(agg, scaled)
-    return agg
-
-def request_partials(tbs: bytes, node_addresses: List[str], threshold:int) -> List[Tuple[int,bytes]]:
     print("TBS digest:", hashlib.sha256(tbs).hexdigest())
-    parts=[]
-    for addr in node_addresses:
-        print(f"→ contacting {addr}")
-        ch=grpc.insecure_channel(addr)
-        stub=pbg.CANodeStub(ch)
-        try:
-            resp=stub.SignPartial(pb.NodeSignReq(tbs_cert=tbs, req_id=str(uuid.uuid4())), timeout=3)
-            print(f"  got response from {addr}: ok={resp.ok}, msg={resp.msg}, len={len(resp.partial_sig)}")
-            if resp.ok: 
-                parts.append((resp.node_index, resp.partial_sig))
-        except Exception as e:
-            print(f"  node failed: {addr}, error={e}")
-        if len(parts)>=threshold: 
-            break
-    return parts
+    req = pb.NodeSignReq(tbs_cert=tbs, req_id=str(uuid.uuid4()))
+
+    def invoke(addr):
+        return get_stub(addr).SignPartial.future(req, timeout=PARTIAL_TIMEOUT)
+
+    return collect_verified_partials(node_addresses, invoke, threshold,
+                                     lambda parts: verify_partials(tbs, parts, share_pks),
+                                     strategy, latency_tracker("SignPartial"), hedge_percentile)
+
+def request_partials_batch(tbs_list: List[bytes], node_addresses: List[str], threshold: int,
+                           strategy: str = "hedged",
+                           hedge_percentile: float = HEDGE_PERCENTILE,
+                           share_pks=None) -> List[List[Tuple[int, bytes]]]:
+    """
+    Get partials for many TBS blobs with one SignPartialBatch call per node.
+    Returns, for each TBS in order, its list of (node_index, partial_sig).
+    A node whose batch does not verify against its share key is replaced.
+    More than BATCH_SIZE TBS are sent in several batches.
+    """
+    if len(tbs_list) > BATCH_SIZE:
+        return [parts for i in range(0, len(tbs_list), BATCH_SIZE)
+                for parts in request_partials_batch(tbs_list[i:i + BATCH_SIZE], node_addresses, threshold,
+                                                    strategy, hedge_percentile, share_pks)]
+    print(f"Batch of {len(tbs_list)} TBS")
+    req = pb.NodeSignBatchReq(tbs_certs=tbs_list, req_id=str(uuid.uuid4()))
+
+    def invoke(addr):
+        return get_stub(addr).SignPartialBatch.future(req, timeout=PARTIAL_TIMEOUT * len(tbs_list))
+
+    def verify(node_parts):
+        return verify_partial_batches(tbs_list, node_parts, share_pks)
+
+    node_parts = collect_verified_partials(node_addresses, invoke, threshold, verify, strategy,
+                                           latency_tracker("SignPartialBatch"), hedge_percentile,
+                                           field="partial_sigs")
+    return [[(i, sigs[j]) for (i, sigs) in node_parts] for j in range(len(tbs_list))]
     
+def issue_via_coordinator(coordinator: str, subject_cn: str, pub_pem: bytes, is_ca: bool,
+                          validity_days: int = 365) -> bytes:
+    """
+    Have one node of the issuing level build, threshold-sign and verify the
+    cert. Returns the PEM bundle (cert + chain).
+    """
+    req = pb.CSRRequest(subject_cn=subject_cn, public_key=pub_pem,
+                        validity_days=validity_days, is_ca=is_ca)
+    resp = get_stub(coordinator).IssueCertificate(req, timeout=ISSUE_TIMEOUT)
+    if not resp.ok:
+        raise RuntimeError(f"{coordinator} could not issue {subject_cn}: {resp.msg}")
+    return resp.certificate
+
 def dump_cert(cert: Certificate):
     print(f"Serial:       {cert.serial}")
     print(f"Subject CN:   {cert.subject_cn}")
@@ -87,6 +108,16 @@ def main():
     ap.add_argument("--threshold", type=int, default=int(os.getenv("THRESHOLD", "2")))
     ap.add_argument("--ca", action="store_true", help="Mark this cert as a CA certificate")
     ap.add_argument("--verify", action="store_true", help="Verify the resulting cert + chain after issuance")
+    ap.add_argument("--fanout", choices=FANOUT_STRATEGIES, default="hedged",
+                    help="How to contact the nodes: one after another, all at once, "
+                         "or threshold nodes plus hedged spares (default)")
+    ap.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE,
+                    help="Ask a spare node once a call is slower than this latency percentile")
+    ap.add_argument("--count", type=int, default=1,
+                    help="Issue this many certs (<cn>-1 .. <cn>-N) with one SignPartialBatch per node")
+    ap.add_argument("--coordinator", default=None, metavar="ADDR",
+                    help="Let this node of the issuing level collect the partials and "
+                         "return the finished cert (one RPC per cert; not for level 1)")
 
     args = ap.parse_args()
     
@@ -108,6 +139,8 @@ def main():
         if not parent_env:
             raise RuntimeError(f"Missing env LEVEL{parent_level}_NODES")
         node_addresses = parent_env.split(",")
+    precompute_lagrange(len(node_addresses), threshold)
+    share_pks = load_share_pks(parent_level or level)
 
     # Load issuer chain if not root
     chain = []
@@ -125,52 +158,83 @@ def main():
 
     # Subject keypair + TBS cert
     now = datetime.utcnow()
+    cns = [cn] if args.count == 1 else [f"{cn}-{i}" for i in range(1, args.count + 1)]
 
-    if args.ca:
-        with open(f"level{level}_master_pk.hex") as f:
-            pk_bytes = bytes.fromhex(f.read().strip())
-        pub_pem = b"BLS-PUBKEY:" + pk_bytes
-    else:
-        _, pub_pem = gen_rsa_keypair()
+    certs = []
+    for subject_cn in cns:
+        if args.ca:
+            with open(f"level{level}_master_pk.hex") as f:
+                pk_bytes = bytes.fromhex(f.read().strip())
+            pub_pem = b"BLS-PUBKEY:" + pk_bytes
+        else:
+            _, pub_pem = gen_rsa_keypair()
 
-    issuer_cn = f"Level{level-1}CA" if level > 1 else cn
-    cert = Certificate(
-        serial=str(uuid.uuid4()),
-        subject_cn=cn,
-        issuer_cn=issuer_cn,
-        not_before=now,
-        not_after=now + timedelta(days=365),
-        subject_pub_pem=pub_pem,
-        is_ca=args.ca
-    )
+        if args.coordinator:
+            if level == 1:
+                raise RuntimeError("--coordinator issues under an existing CA cert; sign level 1 directly")
+            pem = issue_via_coordinator(args.coordinator, subject_cn, pub_pem, args.ca)
+            cert = Certificate.from_pem(pem)[0]
+            agg = engine.g2_from_bytes(cert.signature)
+            os.makedirs("certs", exist_ok=True)
+            path = f"certs/level{level}_{subject_cn}.pem"
+            with open(path, "wb") as f:
+                f.write(pem)
+            print(" Certificate saved to", path)
+            print("verify against issuer:", verify_cert_sig(cert, agg, extract_bls_pubkey(chain[0])))
+            continue
 
-    tbs = cert.to_tbs()
+        issuer_cn = f"Level{level-1}CA" if level > 1 else subject_cn
+        certs.append(Certificate(
+            serial=str(uuid.uuid4()),
+            subject_cn=subject_cn,
+            issuer_cn=issuer_cn,
+            not_before=now,
+            not_after=now + timedelta(days=365),
+            subject_pub_pem=pub_pem,
+            is_ca=args.ca
+        ))
 
     # Collect partials
-    parts = request_partials(tbs, node_addresses, threshold)
+    if not certs:
+        return
+    if len(certs) == 1:
+        parts_list = [request_partials(certs[0].to_tbs(), node_addresses, threshold,
+                                       args.fanout, args.hedge_percentile, share_pks)]
+    else:
+        parts_list = request_partials_batch([c.to_tbs() for c in certs], node_addresses,
+                                            threshold, args.fanout, args.hedge_percentile, share_pks)
+
+    for cert, parts in zip(certs, parts_list):
+        finish_cert(cert, parts, chain, level, threshold, verbose=len(certs) == 1)
+
+
+def finish_cert(cert: Certificate, parts: List[Tuple[int, bytes]], chain, level: int,
+                threshold: int, verbose: bool = True):
+    """Aggregate the partials into the cert signature, save the PEM and verify it."""
     if len(parts) < threshold:
         print("INSUFFICIENT PARTIALS")
         return
 
     agg_sig_point = aggregate_threshold(parts)
-    cert.signature = g2_to_bytes_jac(agg_sig_point)
+    cert.signature = engine.g2_to_bytes(agg_sig_point)
 
     # Save bundled PEM (this cert + chain)
     os.makedirs("certs", exist_ok=True)
     pem = cert.to_pem(chain=chain)
-    path = f"certs/level{level}_{cn}.pem"
+    path = f"certs/level{level}_{cert.subject_cn}.pem"
     with open(path, "wb") as f:
         f.write(pem)
 
-    print("=== Threshold Cert (aggregated) ===")
-    print(pem.decode())
-    
-    print("=== Certificate fields ===")
-    dump_cert(cert)
-    if chain:
-        print("=== Chain ===")
-        for c in (chain if isinstance(chain, list) else [chain]):
-            dump_cert(c)
+    if verbose:
+        print("=== Threshold Cert (aggregated) ===")
+        print(pem.decode())
+        
+        print("=== Certificate fields ===")
+        dump_cert(cert)
+        if chain:
+            print("=== Chain ===")
+            for c in (chain if isinstance(chain, list) else [chain]):
+                dump_cert(c)
 
     print(" Certificate saved to", path)
 
@@ -183,7 +247,7 @@ def main():
 
         if parent.subject_pub_pem.startswith(b"BLS-PUBKEY:"):
             pk_bytes = parent.subject_pub_pem[len(b"BLS-PUBKEY:"):]
-            issuer_pk = bytes_to_g1(pk_bytes)
+            issuer_pk = engine.g1_from_bytes(pk_bytes)
         else:
             raise RuntimeError("Issuer pubkey is not BLS; got: " + parent.subject_pub_pem[:30].decode(errors="ignore"))
 
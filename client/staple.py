@@ -0,0 +1,58 @@
+"""
+Staple pre-signed OCSP responses (see client.ocsp_presign) to a PEM bundle.
+
+For every non-root certificate in the bundle, the response for its serial
+is looked up under <ocsp-dir>/level{issuer}/ and appended to the bundle;
+staples already in the bundle are replaced. `client.is_valid` then checks
+revocation from the staples without asking the nodes.
+"""
+import os
+import re
+import argparse
+
+from common.cert import Certificate
+from common.ocsp import OCSPStaple, strip_staples
+from client.ocsp_presign import staple_path
+
+
+def staple_bundle(cert_path: str, ocsp_dir: str = "ocsp") -> int:
+    """Rewrite `cert_path` with the current staples; returns how many were attached."""
+    with open(cert_path, "rb") as f:
+        pem = strip_staples(f.read())
+    certs = Certificate.from_pem(pem)
+    certs = certs if isinstance(certs, list) else [certs]
+
+    staples = []
+    for cert in certs[:-1]:
+        m = re.search(r"Level(\d+)CA", cert.issuer_cn)
+        if not m:
+            raise RuntimeError(f"Cannot parse issuer level from {cert.issuer_cn}")
+        path = staple_path(ocsp_dir, int(m.group(1)), cert.serial)
+        if not os.path.exists(path):
+            print(f"No OCSP response for {cert.subject_cn} ({path})")
+            continue
+        with open(path, "rb") as f:
+            staple = OCSPStaple.from_pem(f.read())[0]
+        if not staple.is_current():
+            print(f"OCSP response for {cert.subject_cn} is out of date, not stapled")
+            continue
+        staples.append(staple.to_pem())
+
+    with open(cert_path, "wb") as f:
+        f.write(pem + b"".join(staples))
+    return len(staples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Attach pre-signed OCSP responses to a PEM bundle")
+    ap.add_argument("cert_path", nargs="+", help="PEM bundle(s) to staple")
+    ap.add_argument("--ocsp-dir", default="ocsp", help="Where client.ocsp_presign wrote the responses")
+    args = ap.parse_args()
+
+    for path in args.cert_path:
+        n = staple_bundle(path, args.ocsp_dir)
+        print(f"{path}: {n} OCSP response(s) stapled")
+
+
+if __name__ == "__main__":
+    main()
@@ -56,16 +56,39 @@ class Certificate:
             body = b.split(b"-----END THRESH-CA CERT-----")[0].strip()
             raw = base64.b64decode(body)
             tbs, sig = raw.split(b"||SIG||", 1)
-            serial, subject_cn, issuer_cn, nbf, naf, pub, ca_flag  = tbs.split(b"|")
-            is_ca = (ca_flag == b"CA")
-            certs.append(Certificate(
-                serial=serial.decode(),
-                subject_cn=subject_cn.decode(),
-                issuer_cn=issuer_cn.decode(),
-                not_before=datetime.fromtimestamp(int(nbf)),
-                not_after=datetime.fromtimestamp(int(naf)),
-                subject_pub_pem=pub,
-                signature=sig,
-                is_ca=is_ca
-            ))
+            cert = Certificate.from_tbs(tbs)
+            cert.signature = sig
+            certs.append(cert)
         return certs
+
+    @staticmethod
+    def from_tbs(tbs: bytes) -> "Certificate":
+        """Parse an unsigned Certificate from its TBS; raises ValueError if malformed."""
+        fields = tbs.split(b"|")
+        if len(fields) != 7:
+            raise ValueError(f"TBS has {len(fields)} fields, expected 7")
+        serial, subject_cn, issuer_cn, nbf, naf, pub, ca_flag = fields
+        if ca_flag not in (b"CA", b"EE"):
+            raise ValueError("TBS has no CA/EE flag")
+        return Certificate(
+            serial=serial.decode(),
+            subject_cn=subject_cn.decode(),
+            issuer_cn=issuer_cn.decode(),
+            not_before=datetime.fromtimestamp(int(nbf)),
+            not_after=datetime.fromtimestamp(int(naf)),
+            subject_pub_pem=pub,
+            is_ca=(ca_flag == b"CA")
+        )
+
+
+# Messages the level key also signs (revocations, OCSP, CRLite, CRL roots).
+# A TBS must never start with one of these, or a signature on it would
+# double as one of those statements.
+RESERVED_PREFIXES = (b"REVOKE:", b"REVOKE-BATCH:", b"OCSP:", b"CRLITE:", b"CRL-ROOT:")
+
+
+def check_tbs(tbs: bytes):
+    """Raise ValueError unless `tbs` is a certificate TBS that is safe to sign."""
+    if tbs.startswith(RESERVED_PREFIXES):
+        raise ValueError("refusing to sign a reserved message type")
+    Certificate.from_tbs(tbs)
@@ -0,0 +1,97 @@
+# common/channels.py
+"""
+Process-wide pool of gRPC channels to CA nodes, keyed by address.
+
+Channels are opened once with keepalive and reused by every call. A channel
+that the gRPC runtime reports as failed or shut down is evicted and reopened
+on next use, and close_channels() (also run at exit) closes them all.
+The nodes' servers are started with SERVER_KEEPALIVE_OPTIONS, which let
+these pings through; a server on the defaults answers them with GOAWAY
+"too_many_pings" and the channels would be torn down every few minutes.
+"""
+import atexit
+import threading
+
+import grpc
+
+import proto.ca_pb2_grpc as pbg
+
+KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+# Server side of the above: accept a ping every keepalive_time_ms, with or
+# without calls in flight.
+SERVER_KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_recv_ping_interval_without_data_ms", 20_000),
+    ("grpc.http2.max_ping_strikes", 0),
+]
+
+_UNHEALTHY = (grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN)
+
+
+class _Entry:
+    def __init__(self, addr, options):
+        self.channel = grpc.insecure_channel(addr, options=options)
+        self.stub = pbg.CANodeStub(self.channel)
+        self.state = grpc.ChannelConnectivity.IDLE
+        self.channel.subscribe(self._on_state)
+
+    def _on_state(self, state):
+        self.state = state
+
+    def close(self):
+        self.channel.unsubscribe(self._on_state)
+        self.channel.close()
+
+
+class ChannelPool:
+    def __init__(self, options=KEEPALIVE_OPTIONS):
+        self._options = options
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def stub(self, addr: str) -> pbg.CANodeStub:
+        """Return the CANode stub for `addr`, reopening its channel if it is unhealthy."""
+        with self._lock:
+            entry = self._entries.get(addr)
+            if entry is not None and entry.state in _UNHEALTHY:
+                entry.close()
+                entry = None
+            if entry is None:
+                entry = self._entries[addr] = _Entry(addr, self._options)
+            return entry.stub
+
+    def evict(self, addr: str):
+        with self._lock:
+            entry = self._entries.pop(addr, None)
+        if entry is not None:
+            entry.close()
+
+    def close(self):
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        for entry in entries:
+            entry.close()
+
+
+_POOL = ChannelPool()
+
+
+def get_stub(addr: str) -> pbg.CANodeStub:
+    return _POOL.stub(addr)
+
+
+def evict_channel(addr: str):
+    _POOL.evict(addr)
+
+
+def close_channels():
+    _POOL.close()
+
+
+atexit.register(close_channels)
@@ -0,0 +1,169 @@
+# common/crlite.py
+"""
+CRLite-style Bloom filter cascade over one CA level's certificates.
+
+Level 0 holds the revoked serials. Level 1 holds the valid serials that
+level 0 wrongly matches, level 2 the revoked serials that level 1 wrongly
+matches, and so on until nothing is left. For every serial the cascade
+was built from, the answer is exact: a serial is revoked iff the first
+level that does not contain it is odd (or it is in every level and the
+number of levels is odd).
+
+Serials outside the build set get arbitrary answers, so a cascade also
+carries that set: only the serials in it are covered, every other serial
+has to be checked with the nodes. A cascade is only good from `built_at`
+until `next_update`; after that clients ignore it, as a revocation made
+since may be missing.
+
+Wire format (big-endian):
+    b"CRLITE3" | ca_level u8 | built_at u64 | next_update u64 |
+    n_serials u32 | per covered serial, sorted: len u8 | utf-8 |
+    n_levels u8 | per level: m_bits u32 | k u8 | bits (ceil(m/8) bytes)
+A signed filter is that blob followed by the level's 96-byte threshold
+signature on filter_message(blob).
+"""
+import hashlib
+import math
+import struct
+
+from common.ocsp import now
+
+MAGIC = b"CRLITE3"
+SIG_LEN = 96
+LEVEL0_MAX_FP = 0.5   # false-positive rate of the deeper levels
+MAX_LEVELS = 64
+DEFAULT_VALIDITY = 24 * 3600      # built_at..next_update of a new filter
+MAX_VALIDITY = 7 * 24 * 3600      # longest window nodes will sign
+
+
+def filter_message(blob: bytes) -> bytes:
+    """The message the CA level threshold-signs for a filter blob."""
+    return b"CRLITE:" + hashlib.sha256(blob).digest()
+
+
+class BloomFilter:
+    def __init__(self, m: int, k: int, salt: bytes, bits: bytearray = None):
+        self.m, self.k, self.salt = m, k, salt
+        self.bits = bits if bits is not None else bytearray((m + 7) // 8)
+
+    @classmethod
+    def for_items(cls, n: int, fp: float, salt: bytes):
+        m = max(8, math.ceil(-n * math.log(fp) / math.log(2) ** 2))
+        k = max(1, round(m / max(n, 1) * math.log(2)))
+        return cls(m, k, salt)
+
+    def _positions(self, item: str):
+        d = hashlib.sha256(self.salt + item.encode()).digest()
+        h1, h2 = int.from_bytes(d[:8], "big"), int.from_bytes(d[8:16], "big") | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, item: str):
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] >> (p & 7) & 1 for p in self._positions(item))
+
+
+class FilterCascade:
+    def __init__(self, ca_level: int, built_at: int, next_update: int, covered, filters):
+        self.ca_level = ca_level
+        self.built_at = built_at        # unix time the cascade was built
+        self.next_update = next_update  # unix time; the filter is stale after this
+        self.covered = frozenset(covered)  # the serials the cascade answers for
+        self.filters = filters
+
+    @classmethod
+    def build(cls, revoked, valid, ca_level: int, built_at: int, next_update: int):
+        """Build a cascade that answers exactly for every serial in `revoked` and `valid`."""
+        include, exclude = set(revoked), set(valid) - set(revoked)
+        covered = include | exclude
+        # first level sized so its false positives are about as many as the revoked serials
+        fp = min(LEVEL0_MAX_FP, len(include) / len(exclude) / math.sqrt(2)) if exclude else LEVEL0_MAX_FP
+        fp = max(fp, 1e-6)
+        filters = []
+        while include:
+            if len(filters) == MAX_LEVELS:
+                raise RuntimeError("filter cascade did not converge")
+            f = BloomFilter.for_items(len(include), fp, salt=bytes([len(filters)]))
+            for s in include:
+                f.add(s)
+            filters.append(f)
+            include, exclude = {s for s in exclude if s in f}, include
+            fp = LEVEL0_MAX_FP
+        return cls(ca_level, built_at, next_update, covered, filters)
+
+    def is_revoked(self, serial: str) -> bool:
+        """Only meaningful for covered serials; see covers()."""
+        for i, f in enumerate(self.filters):
+            if serial not in f:
+                return i % 2 == 1
+        return len(self.filters) % 2 == 1
+
+    def covers(self, serial: str) -> bool:
+        return serial in self.covered
+
+    def is_current(self, at: int = None) -> bool:
+        at = now() if at is None else at
+        return self.built_at <= at <= self.next_update
+
+    def to_bytes(self) -> bytes:
+        out = [MAGIC, struct.pack(">BQQI", self.ca_level, self.built_at, self.next_update, len(self.covered))]
+        for serial in sorted(self.covered):
+            raw = serial.encode()
+            out.append(struct.pack(">B", len(raw)) + raw)
+        out.append(struct.pack(">B", len(self.filters)))
+        for f in self.filters:
+            out.append(struct.pack(">IB", f.m, f.k))
+            out.append(bytes(f.bits))
+        return b"".join(out)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes):
+        if not blob.startswith(MAGIC):
+            raise ValueError("not a CRLite filter")
+        off = len(MAGIC)
+        try:
+            ca_level, built_at, next_update, n_serials = struct.unpack_from(">BQQI", blob, off)
+            off += struct.calcsize(">BQQI")
+            covered = []
+            for _ in range(n_serials):
+                size = blob[off]
+                covered.append(blob[off + 1:off + 1 + size].decode())
+                off += 1 + size
+            n = blob[off]
+            off += 1
+        except (struct.error, IndexError):
+            raise ValueError("truncated CRLite filter")
+        filters = []
+        for i in range(n):
+            if off + 5 > len(blob):
+                raise ValueError("truncated CRLite filter")
+            m, k = struct.unpack_from(">IB", blob, off)
+            off += 5
+            size = (m + 7) // 8
+            if off + size > len(blob):
+                raise ValueError("truncated CRLite filter")
+            filters.append(BloomFilter(m, k, bytes([i]), bytearray(blob[off:off + size])))
+            off += size
+        if off != len(blob):
+            raise ValueError("trailing bytes after CRLite filter")
+        return cls(ca_level, built_at, next_update, covered, filters)
+
+
+def filter_path(directory: str, ca_level: int) -> str:
+    return f"{directory}/level{ca_level}.crlite"
+
+
+def save_signed(path: str, blob: bytes, sig: bytes):
+    with open(path, "wb") as f:
+        f.write(blob + sig)
+
+
+def load_signed(path: str):
+    """Return (blob, sig) from a signed filter file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) <= SIG_LEN:
+        raise ValueError(f"{path} is too short for a signed filter")
+    return data[:-SIG_LEN], data[-SIG_LEN:]
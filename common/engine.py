@@ -0,0 +1,246 @@
+# common/engine.py
+"""
+Crypto engine: one interface over the BLS12-381 operations used by the CA.
+
+Two backends are available:
+  - "py_ecc": pure Python, py_ecc.optimized_bls12_381 (default)
+  - "blspy":  native, chia blspy
+
+The backend is picked with the BLS_BACKEND environment variable. Points are
+backend-native objects, so always go through the engine to (de)serialize
+them. Both backends emit the same wire bytes: G2 points are written in the
+96-byte compressed format and read in either that or the legacy 288-byte
+projective format (see common.util).
+"""
+import hashlib
+import os
+import sys
+
+from py_ecc.optimized_bls12_381 import (
+    G1, G2, Z1, Z2, FQ12, add, double, multiply, neg, pairing, final_exponentiate, curve_order as R
+)
+from py_ecc.bls.point_compression import compress_G1, decompress_G1
+
+from common.msm import GroupOps, msm
+from common.util import (
+    L, hash_to_G2_point, g1_to_bytes, bytes_to_g1, g2_to_bytes, bytes_to_g2,
+    g2_to_bytes_jac, G2_COMPRESSED_LEN
+)
+from common.endo import recode, multiply_endo
+
+BACKEND_ENV = "BLS_BACKEND"
+DEFAULT_BACKEND = "py_ecc"
+
+
+class PyEccEngine:
+    name = "py_ecc"
+
+    def __init__(self):
+        self.G1 = G1
+        self.G2 = G2
+        self.G1_neg = neg(G1)
+        self._g1_ops = GroupOps(add, double, neg, Z1)
+        self._g2_ops = GroupOps(add, double, neg, Z2)
+
+    def hash_to_g2(self, msg: bytes):
+        return hash_to_G2_point(msg)
+
+    def g1_mul(self, P, k: int):
+        return multiply(P, k % R)
+
+    def g2_mul(self, P, k: int):
+        return multiply(P, k % R)
+
+    def prepare_scalar(self, k: int):
+        """Precompute the GLS recoding of a scalar that is reused, like a node's share."""
+        return recode(k)
+
+    def g2_mul_many(self, points, k):
+        """Multiply every point by the same scalar (an int or prepare_scalar(k))."""
+        recoded = recode(k) if isinstance(k, int) else k
+        return [multiply_endo(P, recoded) for P in points]
+
+    def g1_msm(self, points, scalars):
+        return msm(points, [k % R for k in scalars], self._g1_ops)
+
+    def g2_msm(self, points, scalars):
+        """Compute sum(k_i * P_i) with one multi-scalar multiplication."""
+        return msm(points, [k % R for k in scalars], self._g2_ops)
+
+    def g1_add(self, P, Q):
+        return add(P, Q)
+
+    def g2_add(self, P, Q):
+        return add(P, Q)
+
+    def g1_neg(self, P):
+        return neg(P)
+
+    def pairing_check(self, pairs) -> bool:
+        """
+        Check prod e(Q_i, P_i) == 1 for pairs [(Q_i in G2, P_i in G1), ...].
+        The Miller loop outputs are multiplied together and a single final
+        exponentiation is run on the product.
+        """
+        f = FQ12.one()
+        for Q, P in pairs:
+            f = f * pairing(Q, P, final_exponentiate=False)
+        return final_exponentiate(f) == FQ12.one()
+
+    def g1_to_bytes(self, P) -> bytes:
+        return g1_to_bytes(P)
+
+    def g1_from_bytes(self, b: bytes):
+        return bytes_to_g1(b)
+
+    def g2_to_bytes(self, P) -> bytes:
+        return g2_to_bytes(P)
+
+    def g2_from_bytes(self, b: bytes):
+        return bytes_to_g2(b)
+
+
+class BlspyEngine:
+    """
+    Native backend. blspy only exposes point addition and pairing, so scalar
+    multiplication is double-and-add over native additions, which is still
+    far cheaper than py_ecc's field arithmetic in Python.
+    """
+    name = "blspy"
+
+    def __init__(self):
+        import blspy
+        self._blspy = blspy
+        self.G1 = blspy.G1Element.generator()
+        self.G2 = blspy.G2Element.generator()
+        self.G1_neg = self.G1.negate()
+        # GTElement.unity() is not reliable in blspy 2.0.3, use e(O, G2) instead
+        self._gt_one = blspy.G1Element().pair(self.G2)
+        self._g1_ops = GroupOps(lambda P, Q: P + Q, lambda P: P + P,
+                                lambda P: P.negate(), blspy.G1Element())
+        self._g2_ops = GroupOps(lambda P, Q: P + Q, lambda P: P + P,
+                                lambda P: P.negate(), blspy.G2Element())
+
+    @staticmethod
+    def _mul(P, k: int, zero):
+        k %= R
+        acc = zero
+        while k:
+            if k & 1:
+                acc = acc + P
+            P = P + P
+            k >>= 1
+        return acc
+
+    def hash_to_g2(self, msg: bytes):
+        h = int.from_bytes(hashlib.sha256(msg).digest(), "big") % R
+        return self.g2_mul(self.G2, h)
+
+    def g1_mul(self, P, k: int):
+        return self._mul(P, k, self._blspy.G1Element())
+
+    def g2_mul(self, P, k: int):
+        return self._mul(P, k, self._blspy.G2Element())
+
+    def prepare_scalar(self, k: int):
+        return k % R
+
+    def g2_mul_many(self, points, k):
+        return [self.g2_mul(P, k) for P in points]
+
+    def g1_msm(self, points, scalars):
+        return msm(points, [k % R for k in scalars], self._g1_ops)
+
+    def g2_msm(self, points, scalars):
+        return msm(points, [k % R for k in scalars], self._g2_ops)
+
+    def g1_add(self, P, Q):
+        return P + Q
+
+    def g2_add(self, P, Q):
+        return P + Q
+
+    def g1_neg(self, P):
+        return P.negate()
+
+    def pairing_check(self, pairs) -> bool:
+        # blspy does not expose the Miller loop, so each pair is a full pairing
+        f = self._gt_one
+        for Q, P in pairs:
+            f = f * P.pair(Q)
+        return f == self._gt_one
+
+    def g1_to_bytes(self, P) -> bytes:
+        return g1_to_bytes(decompress_G1(int.from_bytes(bytes(P), "big")))
+
+    def g1_from_bytes(self, b: bytes):
+        z = compress_G1(bytes_to_g1(b))
+        return self._blspy.G1Element.from_bytes(z.to_bytes(L, "big"))
+
+    def g2_to_bytes(self, P) -> bytes:
+        # blspy's own encoding is the same compressed format
+        return bytes(P)
+
+    def g2_from_bytes(self, b: bytes):
+        if len(b) != G2_COMPRESSED_LEN:
+            b = g2_to_bytes(bytes_to_g2(b))  # legacy format
+        return self._blspy.G2Element.from_bytes(b)
+
+
+_BACKENDS = {
+    PyEccEngine.name: PyEccEngine,
+    BlspyEngine.name: BlspyEngine,
+}
+_ENGINES = {}
+
+
+def get_engine(name: str = None):
+    """Return the (cached) engine for `name`, or for $BLS_BACKEND if not given."""
+    name = name or os.getenv(BACKEND_ENV, DEFAULT_BACKEND)
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown {BACKEND_ENV} '{name}', expected one of {sorted(_BACKENDS)}")
+    if name not in _ENGINES:
+        _ENGINES[name] = _BACKENDS[name]()
+    return _ENGINES[name]
+
+
+def cross_check(msg: bytes = b"engine-cross-check", k: int = 0xC0FFEE) -> bool:
+    """
+    Run the same operations on every backend and check that the serialized
+    results are byte-identical and that the pairing checks agree.
+    """
+    results = []
+    for name in _BACKENDS:
+        e = get_engine(name)
+        pk = e.g1_mul(e.G1, k)
+        h = e.hash_to_g2(msg)
+        sig = e.g2_mul(h, k)
+        sig_many = e.g2_mul_many([h, e.G2], e.prepare_scalar(k))
+        sums = [e.g2_msm([h] * n, [k] * n) for n in (1, 3, 20)]
+        pk_sum = e.g1_msm([e.G1] * 20, [k] * 20)
+        both = e.g2_add(sig, h)
+        sig_rt = e.g2_from_bytes(e.g2_to_bytes(sig))
+        # legacy 288-byte encoding of an unnormalized point equal to `both`
+        legacy = g2_to_bytes_jac(add(bytes_to_g2(e.g2_to_bytes(sig)), bytes_to_g2(e.g2_to_bytes(h))))
+        results.append((
+            e.g1_to_bytes(pk),
+            e.g2_to_bytes(h),
+            e.g2_to_bytes(sig),
+            e.g2_to_bytes(both),
+            [e.g2_to_bytes(P) for P in sig_many],
+            e.pairing_check([(sig_rt, e.G1_neg), (h, pk)]),
+            e.pairing_check([(both, e.G1_neg), (h, pk)]),
+            e.g2_to_bytes(e.g2_from_bytes(legacy)) == e.g2_to_bytes(both),
+            [e.g2_to_bytes(P) for P in sums],
+            e.g1_to_bytes(pk_sum),
+        ))
+        print(f"[{name}] sig={results[-1][2][:16].hex()}... verify={results[-1][5]}")
+    return (all(r == results[0] for r in results) and results[0][2] == results[0][4][0]
+            and results[0][5] and not results[0][6] and results[0][7]
+            and results[0][8][0] == results[0][2])
+
+
+if __name__ == "__main__":
+    ok = cross_check()
+    print("backends agree:", ok)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,233 @@
+# common/fanout.py
+"""
+Helpers for sending the same RPC to several CA nodes and collecting replies.
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+FANOUT_STRATEGIES = ("sequential", "all", "hedged")
+
+# Hedging: a spare node is asked once a call has been outstanding for longer
+# than this percentile of recent latencies of the same RPC.
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = 0.5  # seconds, used until enough samples are recorded
+HEDGE_MIN_SAMPLES = 5
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float, default: float = HEDGE_DEFAULT_DELAY) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return default
+        k = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[k]
+
+
+_TRACKERS = {}
+
+
+def latency_tracker(name: str) -> LatencyTracker:
+    """Return the process-wide tracker for RPC `name`."""
+    return _TRACKERS.setdefault(name, LatencyTracker())
+
+
+class FanOut:
+    """
+    Tracks grpc futures from several nodes and returns their results in
+    completion order. Leaving the `with` block cancels calls still in flight.
+    """
+
+    def __init__(self):
+        self._done = queue.Queue()
+        self._futures = {}
+
+    def submit(self, addr, future):
+        self._futures[addr] = future
+        future.add_done_callback(lambda f: self._done.put((addr, f)))
+
+    @property
+    def pending(self) -> int:
+        return len(self._futures)
+
+    def next(self, timeout=None):
+        """
+        Wait for the next call to finish and return (addr, response, error).
+        Returns None if nothing finished within `timeout` seconds.
+        """
+        while True:
+            try:
+                addr, fut = self._done.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if self._futures.pop(addr, None) is fut:
+                break
+        try:
+            return addr, fut.result(), None
+        except Exception as e:
+            return addr, None, e
+
+    def cancel(self):
+        for fut in self._futures.values():
+            fut.cancel()
+        self._futures.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+
+def collect_partials(node_addresses, invoke, threshold: int, strategy: str = "hedged",
+                     tracker: LatencyTracker = None, hedge_percentile: float = HEDGE_PERCENTILE,
+                     field: str = "partial_sig", answered: set = None):
+    """
+    Collect `threshold` partial signatures (node_index, resp.<field>).
+
+    invoke(addr) starts the signing RPC on one node and returns its grpc
+    future. "sequential" asks the nodes one after another; "all" asks every
+    node at once and returns as soon as `threshold` partials are in,
+    cancelling the rest. "hedged" asks only `threshold` nodes, and asks a
+    spare node when one of them fails, or is slower than `hedge_percentile`
+    of the latencies recorded in `tracker`. Nodes whose call finished,
+    successfully or not, are added to `answered` if it is given.
+    """
+    parts = []
+
+    def take(addr, resp, err):
+        if answered is not None:
+            answered.add(addr)
+        if err is not None:
+            print(f"  node failed: {addr}, error={err}")
+            return
+        value = getattr(resp, field)
+        print(f"  got response from {addr}: ok={resp.ok}, msg={resp.msg}, len={len(value)}")
+        if resp.ok:
+            parts.append((resp.node_index, value))
+
+    if strategy == "sequential":
+        for addr in node_addresses:
+            print(f"→ contacting {addr}")
+            fut = invoke(addr)
+            try:
+                take(addr, fut.result(), None)
+            except Exception as e:
+                take(addr, None, e)
+            if len(parts) >= threshold:
+                break
+        return parts
+
+    if strategy == "all":
+        with FanOut() as fo:
+            for addr in node_addresses:
+                print(f"→ contacting {addr}")
+                fo.submit(addr, invoke(addr))
+            while fo.pending and len(parts) < threshold:
+                take(*fo.next())
+        return parts
+
+    if strategy == "hedged":
+        return _collect_hedged(node_addresses, invoke, threshold, take, parts,
+                               tracker or latency_tracker("default"), hedge_percentile)
+
+    raise ValueError(f"Unknown fan-out strategy '{strategy}', expected one of {FANOUT_STRATEGIES}")
+
+
+def _collect_hedged(node_addresses, invoke, threshold, take, parts, tracker, hedge_percentile):
+    spares = list(node_addresses)
+    started = {}    # addr -> start time of calls in flight
+    hedged = set()  # calls in flight that already got a spare
+
+    with FanOut() as fo:
+        def launch():
+            addr = spares.pop(0)
+            print(f"→ contacting {addr}")
+            started[addr] = time.monotonic()
+            fo.submit(addr, invoke(addr))
+
+        for _ in range(min(threshold, len(spares))):
+            launch()
+
+        while len(parts) < threshold:
+            # replace failed calls right away
+            while spares and len(parts) + fo.pending < threshold:
+                launch()
+            if not fo.pending:
+                break
+
+            delay = tracker.percentile(hedge_percentile)
+            now = time.monotonic()
+            waiting = [a for a in started if a not in hedged]
+            if spares and waiting:
+                deadline = min(started[a] for a in waiting) + delay
+                res = fo.next(timeout=max(0.0, deadline - now))
+            else:
+                res = fo.next()
+
+            if res is None:
+                now = time.monotonic()
+                for a in waiting:
+                    if spares and now - started[a] >= delay:
+                        print(f"  {a} slower than p{hedge_percentile:g} ({delay:.3f}s), hedging")
+                        hedged.add(a)
+                        launch()
+                continue
+
+            addr, resp, err = res
+            t0 = started.pop(addr)
+            hedged.discard(addr)
+            if err is None and resp.ok:
+                tracker.record(time.monotonic() - t0)
+            take(addr, resp, err)
+    return parts
+
+
+def collect_verified_partials(node_addresses, invoke, threshold: int, verify,
+                              strategy: str = "hedged", tracker: LatencyTracker = None,
+                              hedge_percentile: float = HEDGE_PERCENTILE,
+                              field: str = "partial_sig", held=()):
+    """
+    Like collect_partials, but every round of partials is passed through
+    verify(parts) -> (good, bad_indices). Bad partials are dropped and nodes
+    that have not answered yet are asked for replacements, until `threshold`
+    good partials are in or no nodes are left.
+
+    Only the first good partial per node index is kept; a later one for the
+    same index, or for one of the indices in `held` (partials the caller
+    already has), counts as a failure of the node that sent it.
+    """
+    parts, remaining = [], list(node_addresses)
+    seen = set(held)
+    while len(parts) < threshold and remaining:
+        # calls cancelled once enough partials were in may be asked again
+        answered = set()
+        new = collect_partials(remaining, invoke, threshold - len(parts), strategy,
+                               tracker, hedge_percentile, field, answered)
+        good, bad = verify(new)
+        if bad:
+            print(f"  dropped invalid partials from nodes {sorted(bad)}")
+        dups = []
+        for part in good:
+            if part[0] in seen:
+                dups.append(part[0])
+                continue
+            seen.add(part[0])
+            parts.append(part)
+        if dups:
+            print(f"  dropped duplicate partials for node indices {sorted(dups)}")
+        remaining = [a for a in remaining if a not in answered]
+    return parts
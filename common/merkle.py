@@ -0,0 +1,134 @@
+# common/merkle.py
+"""
+Sorted Merkle tree over a CA level's revoked serials.
+
+Leaves are the proven revoked serials in sorted order; hashing follows
+RFC 6962 (leaf = SHA256(0x00 | serial), node = SHA256(0x01 | left | right),
+an unpaired last node is carried up unchanged). The level threshold-signs
+    CRL-ROOT:<epoch>:<size>:<root hex>
+once per epoch, and OCSP answers carry a proof against that root:
+    revoked      the serial's own leaf with its audit path
+    not revoked  the adjacent leaves on either side of where the serial
+                 would sort (one of them at the ends, none if empty)
+Audit paths fix a leaf's index, so adjacency is checked by index.
+"""
+import hashlib
+import os
+from bisect import bisect_left
+
+from common.ocsp import now
+
+EPOCH_SECONDS = int(os.getenv("CRL_EPOCH_SECONDS", "3600"))
+
+HASH_LEN = 32
+EMPTY_ROOT = hashlib.sha256(b"").digest()
+
+
+def leaf_hash(serial: str) -> bytes:
+    return hashlib.sha256(b"\x00" + serial.encode()).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def current_epoch(at: int = None) -> int:
+    return (now() if at is None else at) // EPOCH_SECONDS
+
+
+def is_fresh(epoch: int, at: int = None) -> bool:
+    """A root stays usable for the epoch it was signed in and the next one."""
+    return current_epoch(at) - 1 <= epoch <= current_epoch(at) + 1
+
+
+def root_message(epoch: int, size: int, root: bytes) -> bytes:
+    return f"CRL-ROOT:{epoch}:{size}:{root.hex()}".encode()
+
+
+class MerkleTree:
+    def __init__(self, serials):
+        self.leaves = sorted(set(serials))
+        # each level is its node hashes concatenated, leaves first
+        level = b"".join(leaf_hash(s) for s in self.leaves)
+        self.levels = [level]
+        while len(level) > HASH_LEN:
+            pairs = len(level) // (2 * HASH_LEN)
+            nxt = b"".join(hashlib.sha256(b"\x01" + level[2 * HASH_LEN * k:2 * HASH_LEN * (k + 1)]).digest()
+                           for k in range(pairs))
+            if len(level) % (2 * HASH_LEN):
+                nxt += level[-HASH_LEN:]
+            self.levels.append(nxt)
+            level = nxt
+
+    def __len__(self) -> int:
+        return len(self.leaves)
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1] if self.leaves else EMPTY_ROOT
+
+    def path(self, index: int):
+        """Audit path for leaf `index`, bottom up."""
+        path = []
+        for level in self.levels[:-1]:
+            sib = index ^ 1
+            if sib * HASH_LEN < len(level):
+                path.append(level[sib * HASH_LEN:(sib + 1) * HASH_LEN])
+            index >>= 1
+        return path
+
+    def proof(self, serial: str):
+        """[(leaf serial, index, path)] proving whether `serial` is in the tree."""
+        i = bisect_left(self.leaves, serial)
+        if i < len(self.leaves) and self.leaves[i] == serial:
+            return [(serial, i, self.path(i))]
+        return [(self.leaves[j], j, self.path(j)) for j in (i - 1, i) if 0 <= j < len(self.leaves)]
+
+
+def root_from_path(leaf: bytes, index: int, size: int, path) -> bytes:
+    """Recompute the root from a leaf hash and its audit path (RFC 9162, 2.1.3.2)."""
+    if index >= size:
+        raise ValueError("leaf index out of range")
+    fn, sn, r = index, size - 1, leaf
+    for p in path:
+        if sn == 0:
+            raise ValueError("audit path too long")
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    if sn != 0:
+        raise ValueError("audit path too short")
+    return r
+
+
+def verify_proof(serial: str, leaves, size: int, root: bytes) -> bool:
+    """
+    Check a proof from MerkleTree.proof against a tree of `size` leaves
+    with the given root. Returns True if `serial` is in the tree, False if
+    the proof shows it is not; raises ValueError if the proof is invalid.
+    """
+    leaves = sorted(leaves, key=lambda leaf: leaf[1])
+    for s, index, path in leaves:
+        if root_from_path(leaf_hash(s), index, size, list(path)) != root:
+            raise ValueError(f"bad audit path for leaf {index}")
+    if size == 0:
+        if leaves or root != EMPTY_ROOT:
+            raise ValueError("bad proof for an empty tree")
+        return False
+    if len(leaves) == 1 and leaves[0][0] == serial:
+        return True
+    if len(leaves) == 2:
+        (lo, i, _), (hi, j, _) = leaves
+        if j == i + 1 and lo < serial < hi:
+            return False
+    if len(leaves) == 1:
+        s, index, _ = leaves[0]
+        if (index == 0 and serial < s) or (index == size - 1 and s < serial):
+            return False
+    raise ValueError("proof does not cover the serial")
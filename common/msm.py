@@ -0,0 +1,109 @@
+# common/msm.py
+"""
+Multi-scalar multiplication: sum(k_i * P_i) over a group given by its
+operations, so the same code serves every engine backend.
+
+Small inputs use Straus (interleaved wNAF, one shared doubling chain).
+Larger inputs use Pippenger's bucket method with signed digits, whose
+per-point cost keeps falling as the number of points grows.
+"""
+from typing import Callable, NamedTuple
+
+from common.util import wnaf
+
+STRAUS_MAX_POINTS = 16  # above this Pippenger wins
+STRAUS_WINDOW = 4
+
+
+class GroupOps(NamedTuple):
+    add: Callable
+    double: Callable
+    neg: Callable
+    zero: object
+
+
+def msm(points, scalars, ops: GroupOps):
+    """Compute sum(k * P) for k, P in zip(scalars, points). Scalars must be >= 0."""
+    pairs = [(P, k) for P, k in zip(points, scalars) if k]
+    if not pairs:
+        return ops.zero
+    points, scalars = [P for P, _ in pairs], [k for _, k in pairs]
+    if len(pairs) <= STRAUS_MAX_POINTS:
+        return straus(points, scalars, ops)
+    return pippenger(points, scalars, ops)
+
+
+def straus(points, scalars, ops: GroupOps, w: int = STRAUS_WINDOW):
+    """Interleaved width-w NAF: all points share one chain of doublings."""
+    tables = []
+    for P in points:
+        P2 = ops.double(P)
+        odd = [P]  # P, 3P, ..., (2^(w-1) - 1)P
+        for _ in range(1, 1 << (w - 2)):
+            odd.append(ops.add(odd[-1], P2))
+        tables.append(odd)
+    digits = [wnaf(k, w) for k in scalars]
+
+    acc = None
+    for j in reversed(range(max(len(ds) for ds in digits))):
+        if acc is not None:
+            acc = ops.double(acc)
+        for odd, ds in zip(tables, digits):
+            d = ds[j] if j < len(ds) else 0
+            if d:
+                Q = odd[d >> 1] if d > 0 else ops.neg(odd[-d >> 1])
+                acc = Q if acc is None else ops.add(acc, Q)
+    return ops.zero if acc is None else acc
+
+
+def pippenger_window(n: int) -> int:
+    """Bucket window size (bits) for n points."""
+    return max(2, n.bit_length() - 1)
+
+
+def _signed_digits(k: int, c: int):
+    """
+    Split k >= 0 into base-2^c digits in [-2^(c-1), 2^(c-1)), least
+    significant first. The carry out of the top window can need one digit
+    more than k has bits for; it is always kept.
+    """
+    half, full, mask = 1 << (c - 1), 1 << c, (1 << c) - 1
+    digits = []
+    while k:
+        d = k & mask
+        k >>= c
+        if d >= half:
+            d -= full
+            k += 1
+        digits.append(d)
+    return digits
+
+
+def pippenger(points, scalars, ops: GroupOps, c: int = None):
+    """Bucket method: per c-bit window, sort points into buckets by digit and sum them."""
+    c = c or pippenger_window(len(points))
+    digits = [_signed_digits(k, c) for k in scalars]
+    count = max(len(ds) for ds in digits)
+    negs = [ops.neg(P) for P in points]
+
+    acc = None
+    for w in reversed(range(count)):
+        if acc is not None:
+            for _ in range(c):
+                acc = ops.double(acc)
+        buckets = [None] * (1 << (c - 1))  # buckets[b] collects digit b + 1
+        for P, nP, ds in zip(points, negs, digits):
+            d = ds[w] if w < len(ds) else 0
+            if d:
+                b, Q = (d - 1, P) if d > 0 else (-d - 1, nP)
+                buckets[b] = Q if buckets[b] is None else ops.add(buckets[b], Q)
+        # sum_b (b + 1) * buckets[b] via running sums from the top bucket down
+        running = total = None
+        for B in reversed(buckets):
+            if B is not None:
+                running = B if running is None else ops.add(running, B)
+            if running is not None:
+                total = running if total is None else ops.add(total, running)
+        if total is not None:
+            acc = total if acc is None else ops.add(acc, total)
+    return ops.zero if acc is None else acc
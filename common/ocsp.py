@@ -0,0 +1,70 @@
+# common/ocsp.py
+"""
+Pre-signed OCSP responses.
+
+A CA level threshold-signs the message
+    OCSP:<serial>:<status>:<thisUpdate>:<nextUpdate>
+(status GOOD or REVOKED, times in unix seconds) for a serial it issued.
+The result can be stapled to a certificate bundle as a
+"THRESH-CA OCSP" PEM block and checked offline against the level's key.
+"""
+import base64
+from datetime import datetime
+
+STATUSES = ("GOOD", "REVOKED")
+MAX_VALIDITY = 7 * 24 * 3600  # longest thisUpdate..nextUpdate window nodes will sign
+CLOCK_SKEW = 300              # how far in the future thisUpdate may be
+
+BEGIN = b"-----BEGIN THRESH-CA OCSP-----"
+END = b"-----END THRESH-CA OCSP-----"
+
+
+def now() -> int:
+    """Current time, in the same convention as certificate timestamps."""
+    return int(datetime.utcnow().timestamp())
+
+
+def ocsp_message(serial: str, status: str, this_update: int, next_update: int) -> bytes:
+    return f"OCSP:{serial}:{status}:{this_update}:{next_update}".encode()
+
+
+class OCSPStaple:
+    def __init__(self, serial, status, this_update, next_update, signature=b""):
+        self.serial = serial
+        self.status = status
+        self.this_update = this_update
+        self.next_update = next_update
+        self.signature = signature
+
+    def message(self) -> bytes:
+        return ocsp_message(self.serial, self.status, self.this_update, self.next_update)
+
+    def is_current(self, at: int = None) -> bool:
+        at = now() if at is None else at
+        return self.this_update <= at <= self.next_update
+
+    def to_pem(self) -> bytes:
+        body = base64.b64encode(self.message() + b"||SIG||" + self.signature)
+        return BEGIN + b"\n" + body + b"\n" + END + b"\n"
+
+    @staticmethod
+    def from_pem(pem: bytes) -> list["OCSPStaple"]:
+        """Parse every OCSP block in `pem` (other blocks are ignored)."""
+        staples = []
+        for block in pem.split(BEGIN)[1:]:
+            raw = base64.b64decode(block.split(END)[0].strip())
+            msg, sig = raw.split(b"||SIG||", 1)
+            tag, serial, status, this_update, next_update = msg.decode().split(":")
+            if tag != "OCSP" or status not in STATUSES:
+                raise ValueError("malformed OCSP staple")
+            staples.append(OCSPStaple(serial, status, int(this_update), int(next_update), sig))
+        return staples
+
+
+def strip_staples(pem: bytes) -> bytes:
+    """`pem` without any OCSP blocks."""
+    out = pem
+    while BEGIN in out:
+        head, rest = out.split(BEGIN, 1)
+        out = head.rstrip(b"\n") + b"\n" + rest.split(END, 1)[1].lstrip(b"\n")
+    return out
@@ -0,0 +1,89 @@
+# common/revocation.py
+"""
+Revocation proofs: a serial is revoked by a threshold signature on
+"REVOKE:<serial>" under the level's master key.
+
+Many serials can be revoked with one signature on
+"REVOKE-BATCH:<size>:<root hex>", where root is the Merkle root
+(common/merkle.py) over the batch's sorted serials. The proof for one
+serial of a batch is then
+    b"BATCH" | sig (96) | root (32) | size u32 | index u32 | audit path
+so it can still be checked on its own, with one pairing per batch.
+"""
+import struct
+
+from common.engine import get_engine
+from common.merkle import MerkleTree, leaf_hash, root_from_path, HASH_LEN
+from common.shares import verify_same_key
+
+engine = get_engine()
+
+BATCH_MAGIC = b"BATCH"
+_BATCH_HEADER = struct.Struct(">96s32sII")
+
+
+def revoke_message(serial: str) -> bytes:
+    return f"REVOKE:{serial}".encode()
+
+
+def batch_message(size: int, root: bytes) -> bytes:
+    return f"REVOKE-BATCH:{size}:{root.hex()}".encode()
+
+
+def batch_proofs(tree: MerkleTree, sig: bytes):
+    """{serial: proof} for every serial of a batch signed with `sig`."""
+    proofs = {}
+    for index, serial in enumerate(tree.leaves):
+        header = _BATCH_HEADER.pack(sig, tree.root, len(tree), index)
+        proofs[serial] = BATCH_MAGIC + header + b"".join(tree.path(index))
+    return proofs
+
+
+def _open_proof(serial: str, proof: bytes):
+    """(message, sig bytes) that `proof` rests on; raises ValueError if a batch path is bad."""
+    if not proof.startswith(BATCH_MAGIC):
+        return revoke_message(serial), proof
+    body = proof[len(BATCH_MAGIC):]
+    if len(body) < _BATCH_HEADER.size or (len(body) - _BATCH_HEADER.size) % HASH_LEN:
+        raise ValueError("malformed batch revocation proof")
+    sig, root, size, index = _BATCH_HEADER.unpack_from(body)
+    rest = body[_BATCH_HEADER.size:]
+    path = [rest[i:i + HASH_LEN] for i in range(0, len(rest), HASH_LEN)]
+    if root_from_path(leaf_hash(serial), index, size, path) != root:
+        raise ValueError("serial is not in the revoked batch")
+    return batch_message(size, root), sig
+
+
+def verify_revocation(serial: str, sig: bytes, master_pk) -> bool:
+    try:
+        msg, sig = _open_proof(serial, sig)
+        sig_point = engine.g2_from_bytes(sig)
+    except ValueError:
+        return False
+    msg_point = engine.hash_to_g2(msg)
+    return engine.pairing_check([(sig_point, engine.G1_neg), (msg_point, master_pk)])
+
+
+def verify_revocations(proofs, master_pk) -> bool:
+    """
+    Check many (serial, sig) proofs under one key with two pairings:
+        e(sum r_j*sig_j, -G1) * e(sum r_j*H(REVOKE:serial_j), pk) == 1
+    Proofs from the same batch share one term. A False result only says
+    that some proof is bad.
+    """
+    if not proofs:
+        return True
+    try:
+        signed = list({_open_proof(serial, sig) for serial, sig in proofs})
+        sigs = [engine.g2_from_bytes(sig) for _, sig in signed]
+    except ValueError:
+        return False
+    msgs = [engine.hash_to_g2(msg) for msg, _ in signed]
+    return verify_same_key(msgs, sigs, master_pk)
+
+
+def valid_revocations(proofs, master_pk):
+    """The (serial, sig) proofs that verify: one batch check, per proof only if it fails."""
+    if verify_revocations(proofs, master_pk):
+        return list(proofs)
+    return [(serial, sig) for serial, sig in proofs if verify_revocation(serial, sig, master_pk)]
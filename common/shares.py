@@ -0,0 +1,121 @@
+# common/shares.py
+"""
+Per-node share public keys and checking of partial signatures before they
+are aggregated.
+
+setup.py publishes level{n}_share_pks.json, mapping each node index to its
+share public key sk_i*G1 (hex, 96-byte affine). A partial sigma_i from
+node i on message m is valid iff e(sigma_i, -G1) * e(H(m), pk_i) == 1.
+"""
+import json
+import os
+import secrets
+
+from common.engine import get_engine
+from common.util import lagrange_coeff
+
+engine = get_engine()
+
+RAND_BITS = 64  # size of the random weights in batch checks
+
+
+def share_pks_path(level: int) -> str:
+    return f"level{level}_share_pks.json"
+
+
+def load_share_pks(level: int):
+    """Return {node_index: share pk} for `level`, or None if setup did not publish them."""
+    path = share_pks_path(level)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return {int(i): engine.g1_from_bytes(bytes.fromhex(pk)) for i, pk in json.load(f).items()}
+
+
+def _weights(n: int):
+    return [secrets.randbits(RAND_BITS) | 1 for _ in range(n)]
+
+
+def _check_one_msg(msg_point, items) -> bool:
+    """e(sum r_i*sigma_i, -G1) * e(H(m), sum r_i*pk_i) == 1 for items [(pos, sigma, pk)]."""
+    r = _weights(len(items))
+    sig_acc = engine.g2_msm([sig for _, sig, _ in items], r)
+    pk_acc = engine.g1_msm([pk for _, _, pk in items], r)
+    return engine.pairing_check([(sig_acc, engine.G1_neg), (msg_point, pk_acc)])
+
+
+def _find_bad(msg_point, items):
+    """Positions of the invalid items, by bisecting failed batch checks."""
+    if _check_one_msg(msg_point, items):
+        return []
+    if len(items) == 1:
+        return [items[0][0]]
+    mid = len(items) // 2
+    return _find_bad(msg_point, items[:mid]) + _find_bad(msg_point, items[mid:])
+
+
+def verify_partials(msg: bytes, partials, share_pks):
+    """
+    Split partials [(node_index, sig_bytes)] on `msg` into (good, bad_indices).
+    All partials are checked with one randomized pairing product; only if it
+    fails are they bisected to find the bad ones. Partials are judged one by
+    one, so a bad partial claiming another node's index does not get that
+    node's good partial dropped. Without share keys every partial is
+    accepted.
+    """
+    if share_pks is None or not partials:
+        return list(partials), []
+    items, bad = [], []
+    for pos, (i, sig_b) in enumerate(partials):
+        try:
+            items.append((pos, engine.g2_from_bytes(sig_b), share_pks[i]))
+        except (KeyError, ValueError):
+            bad.append(pos)
+    if items:
+        bad += _find_bad(engine.hash_to_g2(msg), items)
+    bad = set(bad)
+    return ([p for pos, p in enumerate(partials) if pos not in bad],
+            [partials[pos][0] for pos in sorted(bad)])
+
+
+def aggregate_partials(partials):
+    """Combine t partials [(node_index, sig_bytes)] into the threshold signature."""
+    lambdas = lagrange_coeff([i for i, _ in partials])
+    return engine.g2_msm([engine.g2_from_bytes(sig_b) for _, sig_b in partials], lambdas)
+
+
+def verify_same_key(msg_points, sig_points, pk) -> bool:
+    """
+    Check signatures on many messages under one key with two pairings:
+        e(sum r_j*sigma_j, -G1) * e(sum r_j*H(m_j), pk) == 1
+    """
+    r = _weights(len(msg_points))
+    return engine.pairing_check([(engine.g2_msm(sig_points, r), engine.G1_neg),
+                                 (engine.g2_msm(msg_points, r), pk)])
+
+
+def verify_partial_batches(msgs, node_parts, share_pks):
+    """
+    Split [(node_index, [sig_bytes per msg])] into (good, bad_indices). A
+    node that returned the wrong number of partials is bad; otherwise its
+    batch is checked with two pairings:
+        e(sum r_j*sigma_j, -G1) * e(sum r_j*H(m_j), pk_i) == 1
+    """
+    bad = [i for i, sigs in node_parts if len(sigs) != len(msgs)]
+    node_parts = [(i, sigs) for i, sigs in node_parts if len(sigs) == len(msgs)]
+    if share_pks is None or not node_parts:
+        return node_parts, bad
+    msg_points = [engine.hash_to_g2(m) for m in msgs]
+    good = []
+    for i, sigs in node_parts:
+        try:
+            pk = share_pks[i]
+            sig_points = [engine.g2_from_bytes(s) for s in sigs]
+        except (KeyError, ValueError):
+            bad.append(i)
+            continue
+        if verify_same_key(msg_points, sig_points, pk):
+            good.append((i, sigs))
+        else:
+            bad.append(i)
+    return good, bad
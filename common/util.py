@@ -1,7 +1,13 @@
 # common/util.py
 from py_ecc.optimized_bls12_381 import FQ, FQ2, G1, curve_order as R
 import hashlib
-from py_ecc.optimized_bls12_381 import G2, multiply
+import threading
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+from py_ecc.optimized_bls12_381 import G2, Z2, add, double, b2, is_on_curve
+from py_ecc.bls.point_compression import compress_G2, decompress_G2
+from py_ecc.bls.g2_primitives import subgroup_check
 
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization, hashes
@@ -32,7 +38,7 @@ def g1_to_bytes(P) -> bytes:
     # Convert to affine
     if z == FQ.zero():
         raise ValueError("Point at infinity not supported")
-    z_inv = z.inv()
+    z_inv = FQ.one() / z
     x_aff = x * z_inv
     y_aff = y * z_inv
     return fq_to_bytes(x_aff) + fq_to_bytes(y_aff)
@@ -65,6 +71,34 @@ def bytes_to_g2_jac(b: bytes):
     z = bytes_to_fq2(b[4*L:6*L])
     return (x, y, z)
 
+# G2 wire formats, told apart by length:
+#   v1 (legacy): 288 bytes, raw projective (x, y, z) over FQ2, not normalized
+#   v2:           96 bytes, compressed affine x with flag bits for y (zcash format)
+G2_LEGACY_LEN = 6*L
+G2_COMPRESSED_LEN = 2*L
+
+def g2_to_bytes(P) -> bytes:
+    """Serialize a G2 point in the compressed 96-byte format."""
+    z1, z2 = compress_G2(P)
+    return z1.to_bytes(L, "big") + z2.to_bytes(L, "big")
+
+def bytes_to_g2(b: bytes):
+    """
+    Deserialize a G2 point from either wire format. Compressed points are
+    checked to be on the curve and in the r-order subgroup.
+    """
+    if len(b) == G2_COMPRESSED_LEN:
+        P = decompress_G2((int.from_bytes(b[:L], "big"), int.from_bytes(b[L:], "big")))
+        if not subgroup_check(P):
+            raise ValueError("G2 point is not in the r-order subgroup")
+        return P
+    if len(b) == G2_LEGACY_LEN:
+        P = bytes_to_g2_jac(b)
+        if not is_on_curve(P, b2):
+            raise ValueError("G2 point is not on the curve")
+        return P
+    raise ValueError(f"Expected {G2_COMPRESSED_LEN} or {G2_LEGACY_LEN} bytes for G2 point, got {len(b)}")
+
 def bytes_to_g1(b: bytes):
     if len(b) != 96:
         raise ValueError("Expected 96 bytes for G1 point")
@@ -72,22 +106,136 @@ def bytes_to_g1(b: bytes):
     y = FQ(int.from_bytes(b[48:96], "big"))
     return (x, y, FQ.one())
 
+# Fixed-base table for G2: _G2_TABLE[i][j] = j * 2^(G2_WINDOW*i) * G2.
+# A scalar is then split into G2_WINDOW-bit digits and multiplied with one
+# table lookup + add per digit, no doublings.
+G2_WINDOW = 5
+_G2_TABLE = None
+_G2_TABLE_LOCK = threading.Lock()
+
+
+def _build_g2_table(window=G2_WINDOW):
+    table = []
+    base = G2
+    for _ in range((R.bit_length() + window - 1) // window):
+        row = [Z2, base]
+        for _ in range(2, 1 << window):
+            row.append(add(row[-1], base))
+        table.append(row)
+        for _ in range(window):
+            base = double(base)
+    return table
+
+
+def g2_table():
+    """Return the process-wide G2 fixed-base table, building it on first use."""
+    global _G2_TABLE
+    if _G2_TABLE is None:
+        with _G2_TABLE_LOCK:
+            if _G2_TABLE is None:
+                _G2_TABLE = _build_g2_table()
+    return _G2_TABLE
+
+
+def multiply_G2(k: int):
+    """Compute k * G2 using the fixed-base table."""
+    k %= R
+    mask = (1 << G2_WINDOW) - 1
+    acc = Z2
+    for row in g2_table():
+        if not k:
+            break
+        digit = k & mask
+        if digit:
+            acc = add(acc, row[digit])
+        k >>= G2_WINDOW
+    return acc
+
+
+def wnaf(k: int, w: int = 4):
+    """Width-w NAF digits of k >= 0, least significant first."""
+    digits = []
+    while k:
+        d = 0
+        if k & 1:
+            d = k & ((1 << w) - 1)
+            if d >= 1 << (w - 1):
+                d -= 1 << w
+            k -= d
+        digits.append(d)
+        k >>= 1
+    return digits
+
+
 def hash_to_G2_point(msg: bytes):
     h = int.from_bytes(hashlib.sha256(msg).digest(), "big") % R
-    return multiply(G2, h)
+    return multiply_G2(h)
     
 
+LAGRANGE_CACHE_SIZE = 1024
+
+
+def batch_inverse(values):
+    """Invert every value mod R with a single modular inversion (Montgomery's trick)."""
+    prefix, acc = [], 1
+    for v in values:
+        prefix.append(acc)
+        acc = acc * v % R
+    inv = pow(acc, -1, R)
+    out = [0] * len(values)
+    for i in reversed(range(len(values))):
+        out[i] = inv * prefix[i] % R
+        inv = inv * values[i] % R
+    return out
+
+
+@lru_cache(maxsize=LAGRANGE_CACHE_SIZE)
+def _lagrange_coeff_sorted(indices: tuple) -> tuple:
+    # lambda_j = prod_{m != j} (-x_m) / (x_j - x_m)
+    #          = prod_m (-x_m) / ((-x_j) * prod_{m != j} (x_j - x_m))
+    if len(set(indices)) != len(indices) or any(x % R == 0 for x in indices):
+        raise ValueError(f"Lagrange indices must be distinct and non-zero, got {list(indices)}")
+    num = 1
+    dens = []
+    for xj in indices:
+        num = num * (-xj % R) % R
+        den = -xj % R
+        for xm in indices:
+            if xm != xj:
+                den = den * ((xj - xm) % R) % R
+        dens.append(den)
+    return tuple(num * inv % R for inv in batch_inverse(dens))
+
+
 def lagrange_coeff(indices):
-    """Compute Lagrange coefficients for interpolation at x=0."""
-    coeffs = []
-    for j, xj in enumerate(indices):
-        num, den = 1, 1
-        for m, xm in enumerate(indices):
-            if m == j:
-                continue
-            num = (num * (-xm % R)) % R
-            den = (den * ((xj - xm) % R)) % R
-        coeffs.append((num * pow(den, -1, R)) % R)
-    return coeffs
+    """
+    Compute Lagrange coefficients for interpolation at x=0, in the order of
+    `indices`. Results are cached per index set.
+    """
+    key = tuple(sorted(indices))
+    coeffs = dict(zip(key, _lagrange_coeff_sorted(key)))
+    return [coeffs[i] for i in indices]
+
+
+def precompute_lagrange(n: int, threshold: int):
+    """
+    Warm the coefficient cache for nodes 1..n. Every threshold-sized subset
+    is computed if they all fit in the cache, otherwise only the subsets a
+    client usually ends up with: the first `threshold` nodes with at most one
+    of them replaced by a spare.
+    """
+    if threshold < 1 or threshold > n:
+        return
+    nodes = range(1, n + 1)
+    if comb(n, threshold) <= LAGRANGE_CACHE_SIZE:
+        subsets = combinations(nodes, threshold)
+    else:
+        first = list(nodes[:threshold])
+        subsets = [tuple(first)] + [
+            tuple(sorted(first[:i] + first[i + 1:] + [spare]))
+            for i in range(threshold) for spare in nodes[threshold:]
+        ]
+    for subset in subsets:
+        _lagrange_coeff_sorted(subset)
 
 
@@ -35,6 +35,9 @@ def generate_compose(num_levels, nodes_per_level, threshold):
             lines.append('    environment:')
             lines.append(f'      - CONFIG_PATH=node_config/level{level}/node{i}.json')
             lines.append(f'      - GRPC_PORT={port}')
+            base = base_ports.get(level, 50060 + 10*level)
+            peers = ",".join(f"level{level}_node{j}:{base+j}" for j in range(1, nodes_per_level + 1) if j != i)
+            lines.append(f'      - PEERS={peers}')
             lines.append('    volumes:')
             lines.append('      - .:/app')
             lines.append('    ports:')
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x08\x63\x61.proto\x12\x08threshca\"\x0c\n\nCRLRequest\"=\n\x0b\x43RLResponse\x12\x17\n\x0frevoked_serials\x18\x01 \x03(\t\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\"\x1d\n\x0bOCSPRequest\x12\x0e\n\x06serial\x18\x01 \x01(\t\"\x82\x01\n\x0cOCSPResponse\x12-\n\x06status\x18\x01 \x01(\x0e\x32\x1d.threshca.OCSPResponse.Status\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\",\n\x06Status\x12\x0b\n\x07UNKNOWN\x10\x00\x12\x08\n\x04GOOD\x10\x01\x12\x0b\n\x07REVOKED\x10\x02\"/\n\x0bNodeSignReq\x12\x10\n\x08tbs_cert\x18\x01 \x01(\x0c\x12\x0e\n\x06req_id\x18\x02 \x01(\t\"P\n\x0cNodeSignResp\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x13\n\x0bpartial_sig\x18\x03 \x01(\x0c\x12\x12\n\nnode_index\x18\x04 \x01(\r\"\x1f\n\rRevokeRequest\x12\x0e\n\x06serial\x18\x01 \x01(\t\"2\n\x17\x41pplyRevocationResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\"8\n\x0fRevocationProof\x12\x0e\n\x06serial\x18\x01 \x01(\t\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\")\n\x0eRevokeResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\"K\n\nCSRRequest\x12\x12\n\nsubject_cn\x18\x01 \x01(\t\x12\x12\n\npublic_key\x18\x02 \x01(\x0c\x12\x15\n\rvalidity_days\x18\x03 \x01(\x05\"<\n\x0c\x43\x65rtResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x13\n\x0b\x63\x65rtificate\x18\x03 \x01(\x0c\x32\xbe\x03\n\x06\x43\x41Node\x12@\n\x10IssueCertificate\x12\x14.threshca.CSRRequest\x1a\x16.threshca.CertResponse\x12<\n\x0bSignPartial\x12\x15.threshca.NodeSignReq\x1a\x16.threshca.NodeSignResp\x12\x44\n\x11SignRevokePartial\x12\x17.threshca.RevokeRequest\x1a\x16.threshca.NodeSignResp\x12\x46\n\x0f\x41pplyRevocation\x12\x19.threshca.RevocationProof\x1a\x18.threshca.RevokeResponse\x12;\n\x06Revoke\x12\x17.threshca.RevokeRequest\x1a\x18.threshca.RevokeResponse\x12\x32\n\x03\x43RL\x12\x14.threshca.CRLRequest\x1a\x15.threshca.CRLResponse\x12\x35\n\x04OCSP\x12\x15.threshca.OCSPRequest\x1a\x16.threshca.OCSPResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x08\x63\x61.proto\x12\x08threshca\"\x0c\n\nCRLRequest\"O\n\x0b\x43RLResponse\x12\x17\n\x0frevoked_serials\x18\x01 \x03(\t\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\x12\x10\n\x08last_seq\x18\x03 \x01(\x04\">\n\x08\x43RLEntry\x12\x0e\n\x06serial\x18\x01 \x01(\t\x12\x0b\n\x03seq\x18\x02 \x01(\x04\x12\x15\n\rthreshold_sig\x18\x03 \x01(\x0c\"3\n\x0f\x43RLSinceRequest\x12\x11\n\tsince_seq\x18\x01 \x01(\x04\x12\r\n\x05limit\x18\x02 \x01(\r\"O\n\x08\x43RLDelta\x12#\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x12.threshca.CRLEntry\x12\x10\n\x08last_seq\x18\x02 \x01(\x04\x12\x0c\n\x04more\x18\x03 \x01(\x08\"#\n\x0e\x43RLPageRequest\x12\x11\n\tpage_size\x18\x01 \x01(\r\"@\n\x07\x43RLPage\x12#\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x12.threshca.CRLEntry\x12\x10\n\x08last_seq\x18\x02 \x01(\x04\"\x14\n\x12GossipStatsRequest\"\xaa\x01\n\x0fPeerGossipStats\x12\x0c\n\x04peer\x18\x01 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x02 \x01(\x04\x12\x0f\n\x07\x65ntries\x18\x03 \x01(\x04\x12\r\n\x05\x62ytes\x18\x04 \x01(\x04\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x05 \x01(\x04\x12\x10\n\x08rejected\x18\x06 \x01(\x04\x12\x11\n\tcaught_up\x18\x07 \x01(\x08\x12\x13\n\x0blast_ok_age\x18\x08 \x01(\x01\x12\r\n\x05\x65rror\x18\t \x01(\t\"a\n\x13GossipStatsResponse\x12\x0e\n\x06rounds\x18\x01 \x01(\x04\x12\x10\n\x08interval\x18\x02 \x01(\x01\x12(\n\x05peers\x18\x03 \x03(\x0b\x32\x19.threshca.PeerGossipStats\"\x1d\n\x0bOCSPRequest\x12\x0e\n\x06serial\x18\x01 \x01(\t\"\xcf\x01\n\x0cOCSPResponse\x12-\n\x06status\x18\x01 \x01(\x0e\x32\x1d.threshca.OCSPResponse.Status\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\x12%\n\x04root\x18\x03 \x01(\x0b\x32\x17.threshca.SignedCRLRoot\x12$\n\x05proof\x18\x04 \x01(\x0b\x32\x15.threshca.MerkleProof\",\n\x06Status\x12\x0b\n\x07UNKNOWN\x10\x00\x12\x08\n\x04GOOD\x10\x01\x12\x0b\n\x07REVOKED\x10\x02\"#\n\x10OCSPBatchRequest\x12\x0f\n\x07serials\x18\x01 \x03(\t\"\x92\x01\n\x11OCSPBatchResponse\x12/\n\x08statuses\x18\x01 \x03(\x0e\x32\x1d.threshca.OCSPResponse.Status\x12%\n\x04root\x18\x02 \x01(\x0b\x32\x17.threshca.SignedCRLRoot\x12%\n\x06proofs\x18\x03 \x03(\x0b\x32\x15.threshca.MerkleProof\";\n\x0e\x43RLRootSignReq\x12\r\n\x05\x65poch\x18\x01 \x01(\x04\x12\x0c\n\x04size\x18\x02 \x01(\x04\x12\x0c\n\x04root\x18\x03 \x01(\x0c\"Q\n\rSignedCRLRoot\x12\r\n\x05\x65poch\x18\x01 \x01(\x04\x12\x0c\n\x04size\x18\x02 \x01(\x04\x12\x0c\n\x04root\x18\x03 \x01(\x0c\x12\x15\n\rthreshold_sig\x18\x04 \x01(\x0c\"9\n\nMerkleLeaf\x12\x0e\n\x06serial\x18\x01 \x01(\t\x12\r\n\x05index\x18\x02 \x01(\x04\x12\x0c\n\x04path\x18\x03 \x03(\x0c\"3\n\x0bMerkleProof\x12$\n\x06leaves\x18\x01 \x03(\x0b\x32\x14.threshca.MerkleLeaf\"y\n\x0eOCSPStatusItem\x12\x0e\n\x06serial\x18\x01 \x01(\t\x12-\n\x06status\x18\x02 \x01(\x0e\x32\x1d.threshca.OCSPResponse.Status\x12\x13\n\x0bthis_update\x18\x03 \x01(\x04\x12\x13\n\x0bnext_update\x18\x04 \x01(\x04\";\n\x10OCSPSignBatchReq\x12\'\n\x05items\x18\x01 \x03(\x0b\x32\x18.threshca.OCSPStatusItem\"/\n\x0bNodeSignReq\x12\x10\n\x08tbs_cert\x18\x01 \x01(\x0c\x12\x0e\n\x06req_id\x18\x02 \x01(\t\"P\n\x0cNodeSignResp\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x13\n\x0bpartial_sig\x18\x03 \x01(\x0c\x12\x12\n\nnode_index\x18\x04 \x01(\r\"5\n\x10NodeSignBatchReq\x12\x11\n\ttbs_certs\x18\x01 \x03(\x0c\x12\x0e\n\x06req_id\x18\x02 \x01(\t\"V\n\x11NodeSignBatchResp\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x14\n\x0cpartial_sigs\x18\x03 \x03(\x0c\x12\x12\n\nnode_index\x18\x04 \x01(\r\"\x1f\n\rRevokeRequest\x12\x0e\n\x06serial\x18\x01 \x01(\t\"\x1f\n\rFilterSignReq\x12\x0e\n\x06\x66ilter\x18\x01 \x01(\x0c\"2\n\x17\x41pplyRevocationResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\"8\n\x0fRevocationProof\x12\x0e\n\x06serial\x18\x01 \x01(\t\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\"%\n\x12RevokeBatchRequest\x12\x0f\n\x07serials\x18\x01 \x03(\t\">\n\x14RevocationBatchProof\x12\x0f\n\x07serials\x18\x01 \x03(\t\x12\x15\n\rthreshold_sig\x18\x02 \x01(\x0c\")\n\x0eRevokeResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\"Z\n\nCSRRequest\x12\x12\n\nsubject_cn\x18\x01 \x01(\t\x12\x12\n\npublic_key\x18\x02 \x01(\x0c\x12\x15\n\rvalidity_days\x18\x03 \x01(\x05\x12\r\n\x05is_ca\x18\x04 \x01(\x08\"<\n\x0c\x43\x65rtResponse\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0b\n\x03msg\x18\x02 \x01(\t\x12\x13\n\x0b\x63\x65rtificate\x18\x03 \x01(\x0c\x32\xd2\t\n\x06\x43\x41Node\x12@\n\x10IssueCertificate\x12\x14.threshca.CSRRequest\x1a\x16.threshca.CertResponse\x12<\n\x0bSignPartial\x12\x15.threshca.NodeSignReq\x1a\x16.threshca.NodeSignResp\x12K\n\x10SignPartialBatch\x12\x1a.threshca.NodeSignBatchReq\x1a\x1b.threshca.NodeSignBatchResp\x12\x44\n\x11SignRevokePartial\x12\x17.threshca.RevokeRequest\x1a\x16.threshca.NodeSignResp\x12\x44\n\x11SignFilterPartial\x12\x17.threshca.FilterSignReq\x1a\x16.threshca.NodeSignResp\x12O\n\x14SignOCSPBatchPartial\x12\x1a.threshca.OCSPSignBatchReq\x1a\x1b.threshca.NodeSignBatchResp\x12\x43\n\x0fSignRootPartial\x12\x18.threshca.CRLRootSignReq\x1a\x16.threshca.NodeSignResp\x12>\n\tApplyRoot\x12\x17.threshca.SignedCRLRoot\x1a\x18.threshca.RevokeResponse\x12\x46\n\x0f\x41pplyRevocation\x12\x19.threshca.RevocationProof\x1a\x18.threshca.RevokeResponse\x12N\n\x16SignRevokeBatchPartial\x12\x1c.threshca.RevokeBatchRequest\x1a\x16.threshca.NodeSignResp\x12P\n\x14\x41pplyRevocationBatch\x12\x1e.threshca.RevocationBatchProof\x1a\x18.threshca.RevokeResponse\x12;\n\x06Revoke\x12\x17.threshca.RevokeRequest\x1a\x18.threshca.RevokeResponse\x12\x32\n\x03\x43RL\x12\x14.threshca.CRLRequest\x1a\x15.threshca.CRLResponse\x12\x39\n\x08\x43RLSince\x12\x19.threshca.CRLSinceRequest\x1a\x12.threshca.CRLDelta\x12:\n\tCRLStream\x12\x18.threshca.CRLPageRequest\x1a\x11.threshca.CRLPage0\x01\x12J\n\x0bGossipStats\x12\x1c.threshca.GossipStatsRequest\x1a\x1d.threshca.GossipStatsResponse\x12\x35\n\x04OCSP\x12\x15.threshca.OCSPRequest\x1a\x16.threshca.OCSPResponse\x12\x44\n\tOCSPBatch\x12\x1a.threshca.OCSPBatchRequest\x1a\x1b.threshca.OCSPBatchResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -34,29 +34,71 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_CRLREQUEST']._serialized_start=22
   _globals['_CRLREQUEST']._serialized_end=34
   _globals['_CRLRESPONSE']._serialized_start=36
-  _globals['_CRLRESPONSE']._serialized_end=97
-  _globals['_OCSPREQUEST']._serialized_start=99
-  _globals['_OCSPREQUEST']._serialized_end=128
-  _globals['_OCSPRESPONSE']._serialized_start=131
-  _globals['_OCSPRESPONSE']._serialized_end=261
-  _globals['_OCSPRESPONSE_STATUS']._serialized_start=217
-  _globals['_OCSPRESPONSE_STATUS']._serialized_end=261
-  _globals['_NODESIGNREQ']._serialized_start=263
-  _globals['_NODESIGNREQ']._serialized_end=310
-  _globals['_NODESIGNRESP']._serialized_start=312
-  _globals['_NODESIGNRESP']._serialized_end=392
-  _globals['_REVOKEREQUEST']._serialized_start=394
-  _globals['_REVOKEREQUEST']._serialized_end=425
-  _globals['_APPLYREVOCATIONRESPONSE']._serialized_start=427
-  _globals['_APPLYREVOCATIONRESPONSE']._serialized_end=477
-  _globals['_REVOCATIONPROOF']._serialized_start=479
-  _globals['_REVOCATIONPROOF']._serialized_end=535
-  _globals['_REVOKERESPONSE']._serialized_start=537
-  _globals['_REVOKERESPONSE']._serialized_end=578
-  _globals['_CSRREQUEST']._serialized_start=580
-  _globals['_CSRREQUEST']._serialized_end=655
-  _globals['_CERTRESPONSE']._serialized_start=657
-  _globals['_CERTRESPONSE']._serialized_end=717
-  _globals['_CANODE']._serialized_start=720
-  _globals['_CANODE']._serialized_end=1166
+  _globals['_CRLRESPONSE']._serialized_end=115
+  _globals['_CRLENTRY']._serialized_start=117
+  _globals['_CRLENTRY']._serialized_end=179
+  _globals['_CRLSINCEREQUEST']._serialized_start=181
+  _globals['_CRLSINCEREQUEST']._serialized_end=232
+  _globals['_CRLDELTA']._serialized_start=234
+  _globals['_CRLDELTA']._serialized_end=313
+  _globals['_CRLPAGEREQUEST']._serialized_start=315
+  _globals['_CRLPAGEREQUEST']._serialized_end=350
+  _globals['_CRLPAGE']._serialized_start=352
+  _globals['_CRLPAGE']._serialized_end=416
+  _globals['_GOSSIPSTATSREQUEST']._serialized_start=418
+  _globals['_GOSSIPSTATSREQUEST']._serialized_end=438
+  _globals['_PEERGOSSIPSTATS']._serialized_start=441
+  _globals['_PEERGOSSIPSTATS']._serialized_end=611
+  _globals['_GOSSIPSTATSRESPONSE']._serialized_start=613
+  _globals['_GOSSIPSTATSRESPONSE']._serialized_end=710
+  _globals['_OCSPREQUEST']._serialized_start=712
+  _globals['_OCSPREQUEST']._serialized_end=741
+  _globals['_OCSPRESPONSE']._serialized_start=744
+  _globals['_OCSPRESPONSE']._serialized_end=951
+  _globals['_OCSPRESPONSE_STATUS']._serialized_start=907
+  _globals['_OCSPRESPONSE_STATUS']._serialized_end=951
+  _globals['_OCSPBATCHREQUEST']._serialized_start=953
+  _globals['_OCSPBATCHREQUEST']._serialized_end=988
+  _globals['_OCSPBATCHRESPONSE']._serialized_start=991
+  _globals['_OCSPBATCHRESPONSE']._serialized_end=1137
+  _globals['_CRLROOTSIGNREQ']._serialized_start=1139
+  _globals['_CRLROOTSIGNREQ']._serialized_end=1198
+  _globals['_SIGNEDCRLROOT']._serialized_start=1200
+  _globals['_SIGNEDCRLROOT']._serialized_end=1281
+  _globals['_MERKLELEAF']._serialized_start=1283
+  _globals['_MERKLELEAF']._serialized_end=1340
+  _globals['_MERKLEPROOF']._serialized_start=1342
+  _globals['_MERKLEPROOF']._serialized_end=1393
+  _globals['_OCSPSTATUSITEM']._serialized_start=1395
+  _globals['_OCSPSTATUSITEM']._serialized_end=1516
+  _globals['_OCSPSIGNBATCHREQ']._serialized_start=1518
+  _globals['_OCSPSIGNBATCHREQ']._serialized_end=1577
+  _globals['_NODESIGNREQ']._serialized_start=1579
+  _globals['_NODESIGNREQ']._serialized_end=1626
+  _globals['_NODESIGNRESP']._serialized_start=1628
+  _globals['_NODESIGNRESP']._serialized_end=1708
+  _globals['_NODESIGNBATCHREQ']._serialized_start=1710
+  _globals['_NODESIGNBATCHREQ']._serialized_end=1763
+  _globals['_NODESIGNBATCHRESP']._serialized_start=1765
+  _globals['_NODESIGNBATCHRESP']._serialized_end=1851
+  _globals['_REVOKEREQUEST']._serialized_start=1853
+  _globals['_REVOKEREQUEST']._serialized_end=1884
+  _globals['_FILTERSIGNREQ']._serialized_start=1886
+  _globals['_FILTERSIGNREQ']._serialized_end=1917
+  _globals['_APPLYREVOCATIONRESPONSE']._serialized_start=1919
+  _globals['_APPLYREVOCATIONRESPONSE']._serialized_end=1969
+  _globals['_REVOCATIONPROOF']._serialized_start=1971
+  _globals['_REVOCATIONPROOF']._serialized_end=2027
+  _globals['_REVOKEBATCHREQUEST']._serialized_start=2029
+  _globals['_REVOKEBATCHREQUEST']._serialized_end=2066
+  _globals['_REVOCATIONBATCHPROOF']._serialized_start=2068
+  _globals['_REVOCATIONBATCHPROOF']._serialized_end=2130
+  _globals['_REVOKERESPONSE']._serialized_start=2132
+  _globals['_REVOKERESPONSE']._serialized_end=2173
+  _globals['_CSRREQUEST']._serialized_start=2175
+  _globals['_CSRREQUEST']._serialized_end=2265
+  _globals['_CERTRESPONSE']._serialized_start=2267
+  _globals['_CERTRESPONSE']._serialized_end=2327
+  _globals['_CANODE']._serialized_start=2330
+  _globals['_CANODE']._serialized_end=3564
 # @@protoc_insertion_point(module_scope)
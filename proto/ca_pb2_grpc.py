@@ -44,16 +44,51 @@ class CANodeStub(object):
                 request_serializer=ca__pb2.NodeSignReq.SerializeToString,
                 response_deserializer=ca__pb2.NodeSignResp.FromString,
                 _registered_method=True)
+        self.SignPartialBatch = channel.unary_unary(
+                '/threshca.CANode/SignPartialBatch',
+                request_serializer=ca__pb2.NodeSignBatchReq.SerializeToString,
+                response_deserializer=ca__pb2.NodeSignBatchResp.FromString,
+                _registered_method=True)
         self.SignRevokePartial = channel.unary_unary(
                 '/threshca.CANode/SignRevokePartial',
                 request_serializer=ca__pb2.RevokeRequest.SerializeToString,
                 response_deserializer=ca__pb2.NodeSignResp.FromString,
                 _registered_method=True)
+        self.SignFilterPartial = channel.unary_unary(
+                '/threshca.CANode/SignFilterPartial',
+                request_serializer=ca__pb2.FilterSignReq.SerializeToString,
+                response_deserializer=ca__pb2.NodeSignResp.FromString,
+                _registered_method=True)
+        self.SignOCSPBatchPartial = channel.unary_unary(
+                '/threshca.CANode/SignOCSPBatchPartial',
+                request_serializer=ca__pb2.OCSPSignBatchReq.SerializeToString,
+                response_deserializer=ca__pb2.NodeSignBatchResp.FromString,
+                _registered_method=True)
+        self.SignRootPartial = channel.unary_unary(
+                '/threshca.CANode/SignRootPartial',
+                request_serializer=ca__pb2.CRLRootSignReq.SerializeToString,
+                response_deserializer=ca__pb2.NodeSignResp.FromString,
+                _registered_method=True)
+        self.ApplyRoot = channel.unary_unary(
+                '/threshca.CANode/ApplyRoot',
+                request_serializer=ca__pb2.SignedCRLRoot.SerializeToString,
+                response_deserializer=ca__pb2.RevokeResponse.FromString,
+                _registered_method=True)
         self.ApplyRevocation = channel.unary_unary(
                 '/threshca.CANode/ApplyRevocation',
                 request_serializer=ca__pb2.RevocationProof.SerializeToString,
                 response_deserializer=ca__pb2.RevokeResponse.FromString,
                 _registered_method=True)
+        self.SignRevokeBatchPartial = channel.unary_unary(
+                '/threshca.CANode/SignRevokeBatchPartial',
+                request_serializer=ca__pb2.RevokeBatchRequest.SerializeToString,
+                response_deserializer=ca__pb2.NodeSignResp.FromString,
+                _registered_method=True)
+        self.ApplyRevocationBatch = channel.unary_unary(
+                '/threshca.CANode/ApplyRevocationBatch',
+                request_serializer=ca__pb2.RevocationBatchProof.SerializeToString,
+                response_deserializer=ca__pb2.RevokeResponse.FromString,
+                _registered_method=True)
         self.Revoke = channel.unary_unary(
                 '/threshca.CANode/Revoke',
                 request_serializer=ca__pb2.RevokeRequest.SerializeToString,
@@ -64,11 +99,31 @@ class CANodeStub(object):
                 request_serializer=ca__pb2.CRLRequest.SerializeToString,
                 response_deserializer=ca__pb2.CRLResponse.FromString,
                 _registered_method=True)
+        self.CRLSince = channel.unary_unary(
+                '/threshca.CANode/CRLSince',
+                request_serializer=ca__pb2.CRLSinceRequest.SerializeToString,
+                response_deserializer=ca__pb2.CRLDelta.FromString,
+                _registered_method=True)
+        self.CRLStream = channel.unary_stream(
+                '/threshca.CANode/CRLStream',
+                request_serializer=ca__pb2.CRLPageRequest.SerializeToString,
+                response_deserializer=ca__pb2.CRLPage.FromString,
+                _registered_method=True)
+        self.GossipStats = channel.unary_unary(
+                '/threshca.CANode/GossipStats',
+                request_serializer=ca__pb2.GossipStatsRequest.SerializeToString,
+                response_deserializer=ca__pb2.GossipStatsResponse.FromString,
+                _registered_method=True)
         self.OCSP = channel.unary_unary(
                 '/threshca.CANode/OCSP',
                 request_serializer=ca__pb2.OCSPRequest.SerializeToString,
                 response_deserializer=ca__pb2.OCSPResponse.FromString,
                 _registered_method=True)
+        self.OCSPBatch = channel.unary_unary(
+                '/threshca.CANode/OCSPBatch',
+                request_serializer=ca__pb2.OCSPBatchRequest.SerializeToString,
+                response_deserializer=ca__pb2.OCSPBatchResponse.FromString,
+                _registered_method=True)
 
 
 class CANodeServicer(object):
@@ -86,12 +141,42 @@ class CANodeServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SignPartialBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SignRevokePartial(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SignFilterPartial(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SignOCSPBatchPartial(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SignRootPartial(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ApplyRoot(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def ApplyRevocation(self, request, context):
         """<-- must match client
         """
@@ -99,6 +184,18 @@ class CANodeServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def SignRevokeBatchPartial(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ApplyRevocationBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def Revoke(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -111,12 +208,37 @@ class CANodeServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CRLSince(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CRLStream(self, request, context):
+        """full CRL, paginated
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GossipStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def OCSP(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def OCSPBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CANodeServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -130,16 +252,51 @@ def add_CANodeServicer_to_server(servicer, server):
                     request_deserializer=ca__pb2.NodeSignReq.FromString,
                     response_serializer=ca__pb2.NodeSignResp.SerializeToString,
             ),
+            'SignPartialBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.SignPartialBatch,
+                    request_deserializer=ca__pb2.NodeSignBatchReq.FromString,
+                    response_serializer=ca__pb2.NodeSignBatchResp.SerializeToString,
+            ),
             'SignRevokePartial': grpc.unary_unary_rpc_method_handler(
                     servicer.SignRevokePartial,
                     request_deserializer=ca__pb2.RevokeRequest.FromString,
                     response_serializer=ca__pb2.NodeSignResp.SerializeToString,
             ),
+            'SignFilterPartial': grpc.unary_unary_rpc_method_handler(
+                    servicer.SignFilterPartial,
+                    request_deserializer=ca__pb2.FilterSignReq.FromString,
+                    response_serializer=ca__pb2.NodeSignResp.SerializeToString,
+            ),
+            'SignOCSPBatchPartial': grpc.unary_unary_rpc_method_handler(
+                    servicer.SignOCSPBatchPartial,
+                    request_deserializer=ca__pb2.OCSPSignBatchReq.FromString,
+                    response_serializer=ca__pb2.NodeSignBatchResp.SerializeToString,
+            ),
+            'SignRootPartial': grpc.unary_unary_rpc_method_handler(
+                    servicer.SignRootPartial,
+                    request_deserializer=ca__pb2.CRLRootSignReq.FromString,
+                    response_serializer=ca__pb2.NodeSignResp.SerializeToString,
+            ),
+            'ApplyRoot': grpc.unary_unary_rpc_method_handler(
+                    servicer.ApplyRoot,
+                    request_deserializer=ca__pb2.SignedCRLRoot.FromString,
+                    response_serializer=ca__pb2.RevokeResponse.SerializeToString,
+            ),
             'ApplyRevocation': grpc.unary_unary_rpc_method_handler(
                     servicer.ApplyRevocation,
                     request_deserializer=ca__pb2.RevocationProof.FromString,
                     response_serializer=ca__pb2.RevokeResponse.SerializeToString,
             ),
+            'SignRevokeBatchPartial': grpc.unary_unary_rpc_method_handler(
+                    servicer.SignRevokeBatchPartial,
+                    request_deserializer=ca__pb2.RevokeBatchRequest.FromString,
+                    response_serializer=ca__pb2.NodeSignResp.SerializeToString,
+            ),
+            'ApplyRevocationBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ApplyRevocationBatch,
+                    request_deserializer=ca__pb2.RevocationBatchProof.FromString,
+                    response_serializer=ca__pb2.RevokeResponse.SerializeToString,
+            ),
             'Revoke': grpc.unary_unary_rpc_method_handler(
                     servicer.Revoke,
                     request_deserializer=ca__pb2.RevokeRequest.FromString,
@@ -150,11 +307,31 @@ def add_CANodeServicer_to_server(servicer, server):
                     request_deserializer=ca__pb2.CRLRequest.FromString,
                     response_serializer=ca__pb2.CRLResponse.SerializeToString,
             ),
+            'CRLSince': grpc.unary_unary_rpc_method_handler(
+                    servicer.CRLSince,
+                    request_deserializer=ca__pb2.CRLSinceRequest.FromString,
+                    response_serializer=ca__pb2.CRLDelta.SerializeToString,
+            ),
+            'CRLStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.CRLStream,
+                    request_deserializer=ca__pb2.CRLPageRequest.FromString,
+                    response_serializer=ca__pb2.CRLPage.SerializeToString,
+            ),
+            'GossipStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GossipStats,
+                    request_deserializer=ca__pb2.GossipStatsRequest.FromString,
+                    response_serializer=ca__pb2.GossipStatsResponse.SerializeToString,
+            ),
             'OCSP': grpc.unary_unary_rpc_method_handler(
                     servicer.OCSP,
                     request_deserializer=ca__pb2.OCSPRequest.FromString,
                     response_serializer=ca__pb2.OCSPResponse.SerializeToString,
             ),
+            'OCSPBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.OCSPBatch,
+                    request_deserializer=ca__pb2.OCSPBatchRequest.FromString,
+                    response_serializer=ca__pb2.OCSPBatchResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'threshca.CANode', rpc_method_handlers)
@@ -220,6 +397,33 @@ class CANode(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def SignPartialBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/SignPartialBatch',
+            ca__pb2.NodeSignBatchReq.SerializeToString,
+            ca__pb2.NodeSignBatchResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def SignRevokePartial(request,
             target,
@@ -247,6 +451,114 @@ class CANode(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def SignFilterPartial(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/SignFilterPartial',
+            ca__pb2.FilterSignReq.SerializeToString,
+            ca__pb2.NodeSignResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SignOCSPBatchPartial(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/SignOCSPBatchPartial',
+            ca__pb2.OCSPSignBatchReq.SerializeToString,
+            ca__pb2.NodeSignBatchResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def SignRootPartial(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/SignRootPartial',
+            ca__pb2.CRLRootSignReq.SerializeToString,
+            ca__pb2.NodeSignResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ApplyRoot(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/ApplyRoot',
+            ca__pb2.SignedCRLRoot.SerializeToString,
+            ca__pb2.RevokeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def ApplyRevocation(request,
             target,
@@ -274,6 +586,60 @@ class CANode(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def SignRevokeBatchPartial(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/SignRevokeBatchPartial',
+            ca__pb2.RevokeBatchRequest.SerializeToString,
+            ca__pb2.NodeSignResp.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ApplyRevocationBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/ApplyRevocationBatch',
+            ca__pb2.RevocationBatchProof.SerializeToString,
+            ca__pb2.RevokeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def Revoke(request,
             target,
@@ -328,6 +694,87 @@ class CANode(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def CRLSince(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/CRLSince',
+            ca__pb2.CRLSinceRequest.SerializeToString,
+            ca__pb2.CRLDelta.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def CRLStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/threshca.CANode/CRLStream',
+            ca__pb2.CRLPageRequest.SerializeToString,
+            ca__pb2.CRLPage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GossipStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/GossipStats',
+            ca__pb2.GossipStatsRequest.SerializeToString,
+            ca__pb2.GossipStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def OCSP(request,
             target,
@@ -354,3 +801,30 @@ class CANode(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def OCSPBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/threshca.CANode/OCSPBatch',
+            ca__pb2.OCSPBatchRequest.SerializeToString,
+            ca__pb2.OCSPBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
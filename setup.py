@@ -51,6 +51,7 @@ def main(args):
             f.write(g1_to_bytes_inline(master_pk).hex())
     
         shares = shamir_split(master_sk, n=NODES_PER_LEVEL, t=THRESHOLD)
+        share_pks = {}
     
         for i, s in shares:
             cfg = {
@@ -63,6 +64,11 @@ def main(args):
             os.makedirs(f"node_config/level{level}", exist_ok=True)
             with open(f"node_config/level{level}/node{i}.json", "w") as f:
                 json.dump(cfg, f, indent=2)
+            share_pks[i] = g1_to_bytes_inline(multiply(G1, s)).hex()
+
+        # per-node share public keys, so clients can check partials before aggregating
+        with open(f"level{level}_share_pks.json", "w") as f:
+            json.dump(share_pks, f, indent=2)
     
     print(f"Setup done. Generated {NUM_LEVELS} levels, {NODES_PER_LEVEL} nodes per level.")
     
@@ -0,0 +1,260 @@
+# sharedca/crl_store.py
+"""
+Durable revocation list for a CA node.
+
+Every revocation is appended to a JSON-lines log and fsynced before add()
+returns. Concurrent adds share one fsync: whoever syncs first covers every
+record written so far (group commit). Every SNAPSHOT_EVERY records a new
+log segment is started and the whole list is written to a compacted
+snapshot in the background, after which the older segments are deleted.
+Recovery reads one snapshot plus a short log tail.
+
+Files in the store directory:
+    snapshot.jsonl     {"seq": S} header, then one record per revoked serial
+    log.<seq>.jsonl    log segments, named by the first sequence number
+                       they may hold; records up to S are skipped on replay
+A record is {"seq": n, "serial": "...", "sig": "<hex>"}. `sig` is the
+revocation proof (see common/revocation.py), or "" if the revocation was
+not proven. A batch revocation is written as one record per serial, in
+a single write.
+"""
+import json
+import os
+import threading
+from bisect import bisect_right
+
+SNAPSHOT_EVERY = int(os.getenv("CRL_SNAPSHOT_EVERY", "10000"))
+
+SNAPSHOT = "snapshot.jsonl"
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CRLStore:
+    def __init__(self, directory: str, snapshot_every: int = SNAPSHOT_EVERY):
+        self.dir = directory
+        self.snapshot_every = snapshot_every
+        self._entries = {}   # serial -> (seq, sig bytes)
+        self._seqs = []      # sequence numbers in order, for since()
+        self._serials = []   # serial recorded at each self._seqs position
+        self._seq = 0        # last sequence number written
+        self._durable = 0    # last sequence number known to be on disk
+        self._lock = threading.Lock()       # entries, seq and log writes
+        self._sync_lock = threading.Lock()  # one fsync at a time
+        self._compacting = False
+        self._since_snapshot = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+        self._log = self._open_segment()
+        self._durable = self._seq
+        if self._since_snapshot >= snapshot_every:
+            self._compacting = True
+            self._compact()
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _segments(self):
+        """Log segment file names, oldest first."""
+        names = [n for n in os.listdir(self.dir) if n.startswith("log.") and n.endswith(".jsonl")]
+        return sorted(names, key=lambda n: int(n.split(".")[1]))
+
+    def _open_segment(self):
+        log = open(self._path(f"log.{self._seq + 1}.jsonl"), "a")
+        _fsync_dir(self.dir)
+        return log
+
+    # --- recovery ---
+
+    def _recover(self):
+        snap_seq = 0
+        if os.path.exists(self._path(SNAPSHOT)):
+            with open(self._path(SNAPSHOT)) as f:
+                snap_seq = json.loads(f.readline())["seq"]
+                for line in f:
+                    self._apply(json.loads(line))
+        self._seq = snap_seq
+        tail = 0
+        for name in self._segments():
+            tail += self._replay(self._path(name), snap_seq)
+        self._since_snapshot = tail
+        self._reindex()
+        print(f"[CRL] recovered {len(self._entries)} revoked serials "
+              f"(snapshot seq {snap_seq}, {tail} log records) from {self.dir}")
+
+    def _replay(self, path, after_seq):
+        """
+        Apply log records newer than `after_seq`. A torn last record is cut
+        off: one that does not parse, or that lacks its newline even if it
+        parses, as the next write would be appended to its line.
+        """
+        if not os.path.exists(path):
+            return 0
+        count, good_end = 0, 0
+        with open(path, "rb") as f:
+            lines = f.readlines()
+        for n, line in enumerate(lines):
+            last = n == len(lines) - 1
+            try:
+                rec = json.loads(line)
+                if last and not line.endswith(b"\n"):
+                    raise ValueError("no newline")
+            except ValueError:
+                if last:
+                    print(f"[CRL] dropping torn record at end of {path}")
+                    with open(path, "r+b") as f:
+                        f.truncate(good_end)
+                    break
+                raise
+            good_end += len(line)
+            if rec["seq"] > after_seq:
+                self._apply(rec)
+                count += 1
+        return count
+
+    def _apply(self, rec):
+        self._entries[rec["serial"]] = (rec["seq"], bytes.fromhex(rec["sig"]))
+        self._seq = max(self._seq, rec["seq"])
+
+    def _reindex(self):
+        """Rebuild the seq index from the entries, dropping superseded records."""
+        order = sorted((seq, serial) for serial, (seq, _) in self._entries.items())
+        self._seqs = [seq for seq, _ in order]
+        self._serials = [serial for _, serial in order]
+
+    # --- reads ---
+
+    def __contains__(self, serial) -> bool:
+        return serial in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def serials(self):
+        with self._lock:
+            return list(self._entries)
+
+    def proven(self, upto: int = None):
+        """Serials with a revocation proof, optionally only those recorded by seq `upto`."""
+        with self._lock:
+            return [serial for serial, (seq, sig) in self._entries.items()
+                    if sig and (upto is None or seq <= upto)]
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def since(self, seq: int, limit: int):
+        """
+        Entries recorded after `seq`, oldest first, at most `limit` of them.
+        Returns ([(serial, seq, sig)], cursor, more). Pass `cursor` as `seq`
+        on the next call.
+        """
+        out = []
+        with self._lock:
+            i = bisect_right(self._seqs, seq)
+            while i < len(self._seqs) and len(out) < limit:
+                serial, s = self._serials[i], self._seqs[i]
+                entry = self._entries[serial]
+                if entry[0] == s:  # skip records superseded by a later proof
+                    out.append((serial, s, entry[1]))
+                i += 1
+            more = i < len(self._seqs)
+            cursor = out[-1][1] if more else self._seq
+        return out, cursor, more
+
+    def proof(self, serial) -> bytes:
+        """Aggregated revocation proof for `serial`, or b"" if unknown or unproven."""
+        entry = self._entries.get(serial)
+        return entry[1] if entry else b""
+
+    # --- writes ---
+
+    def add(self, serial: str, sig: bytes = b"") -> bool:
+        """
+        Record `serial` as revoked, with its proof if there is one. Returns
+        False if nothing changed (already revoked, and no new proof). Returns
+        once the record is on disk.
+        """
+        return self.add_many([(serial, sig)]) == 1
+
+    def add_many(self, items) -> int:
+        """
+        Record many (serial, sig) revocations, as add() does for one, with
+        a single write and fsync. Returns how many entries changed.
+        """
+        with self._lock:
+            lines = []
+            for serial, sig in items:
+                entry = self._entries.get(serial)
+                if entry is not None and (entry[1] or not sig):
+                    continue
+                self._seq += 1
+                self._entries[serial] = (self._seq, sig)
+                self._seqs.append(self._seq)
+                self._serials.append(serial)
+                lines.append(json.dumps({"seq": self._seq, "serial": serial, "sig": sig.hex()}) + "\n")
+            if not lines:
+                return 0
+            seq = self._seq
+            self._log.write("".join(lines))
+            self._since_snapshot += len(lines)
+            compact = self._since_snapshot >= self.snapshot_every and not self._compacting
+            if compact:
+                self._compacting = True
+        self._sync(seq)
+        if compact:
+            threading.Thread(target=self._compact, daemon=True).start()
+        return len(lines)
+
+    def _sync(self, seq):
+        with self._sync_lock:
+            if self._durable >= seq:
+                return  # an earlier fsync already covered this record
+            with self._lock:
+                self._log.flush()
+                target, log = self._seq, self._log
+            os.fsync(log.fileno())
+            self._durable = target
+
+    # --- compaction ---
+
+    def _compact(self):
+        try:
+            with self._sync_lock, self._lock:
+                # start a new segment, so adds go on while the snapshot is written
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                self._log = self._open_segment()
+                old = self._segments()[:-1]
+                snap_seq = self._durable = self._seq
+                items = list(self._entries.items())
+                self._since_snapshot = 0
+
+            tmp = self._path(SNAPSHOT + ".tmp")
+            with open(tmp, "w") as f:
+                f.write(json.dumps({"seq": snap_seq}) + "\n")
+                for serial, (seq, sig) in items:
+                    f.write(json.dumps({"seq": seq, "serial": serial, "sig": sig.hex()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._path(SNAPSHOT))
+            _fsync_dir(self.dir)
+            for name in old:
+                os.remove(self._path(name))
+        finally:
+            self._compacting = False
+
+    def close(self):
+        with self._sync_lock, self._lock:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
@@ -0,0 +1,134 @@
+# sharedca/gossip.py
+"""
+Anti-entropy between the CA nodes of one level.
+
+Every GOSSIP_INTERVAL seconds a node asks each peer (PEERS env) for the
+CRL entries past the peer's sequence number it last saw (CRLSince), at
+most GOSSIP_PAGE_SIZE of them. Only entries with a revocation proof the
+node does not hold yet are kept; they are checked in one batch before
+they are recorded. The per-peer cursors are stored next to the CRL, so a
+node that was down picks up where it stopped.
+
+Each round moves at most len(PEERS) * GOSSIP_PAGE_SIZE entries, so a
+backlog of B revocations reaches a node within about
+ceil(B / GOSSIP_PAGE_SIZE) rounds. Per-peer counters are kept for the
+GossipStats RPC.
+"""
+import json
+import os
+import threading
+import time
+
+import proto.ca_pb2 as pb
+from common.channels import get_stub
+from common.fanout import FanOut
+from common.revocation import valid_revocations
+
+GOSSIP_INTERVAL = float(os.getenv("GOSSIP_INTERVAL", "2"))
+GOSSIP_PAGE_SIZE = int(os.getenv("GOSSIP_PAGE_SIZE", "1000"))
+GOSSIP_TIMEOUT = 5  # seconds per CRLSince call
+
+
+def peers_from_env():
+    return [p for p in os.getenv("PEERS", "").split(",") if p]
+
+
+class PeerState:
+    def __init__(self, cursor: int = 0):
+        self.cursor = cursor     # peer's last sequence number pulled
+        self.entries = 0         # entries received
+        self.bytes = 0           # CRLDelta bytes received
+        self.accepted = 0        # proofs recorded
+        self.rejected = 0        # proofs that did not verify
+        self.caught_up = False   # last reply had nothing more
+        self.last_ok = None      # monotonic time of the last good reply
+        self.error = ""
+
+
+class Gossip:
+    def __init__(self, crl, peers, master_pk, directory: str,
+                 interval: float = GOSSIP_INTERVAL, page_size: int = GOSSIP_PAGE_SIZE):
+        self.crl = crl
+        self.master_pk = master_pk
+        self.interval = interval
+        self.page_size = page_size
+        self.path = os.path.join(directory, "gossip.json")
+        self.rounds = 0
+        cursors = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                cursors = json.load(f)
+        self.peers = {addr: PeerState(cursors.get(addr, 0)) for addr in peers}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.round()
+            except Exception as e:
+                print("[gossip] round failed:", e)
+
+    def round(self):
+        """Pull one page of news from every peer at once."""
+        changed = False
+        with FanOut() as fo:
+            for addr, peer in self.peers.items():
+                req = pb.CRLSinceRequest(since_seq=peer.cursor, limit=self.page_size)
+                fo.submit(addr, get_stub(addr).CRLSince.future(req, timeout=GOSSIP_TIMEOUT))
+            while fo.pending:
+                addr, delta, err = fo.next()
+                changed |= self._take(addr, self.peers[addr], delta, err)
+        self.rounds += 1
+        if changed:
+            self._save()
+
+    def _take(self, addr, peer: PeerState, delta, err) -> bool:
+        if err is not None:
+            error = err.code().name if hasattr(err, "code") else str(err)
+            if not peer.error:
+                print(f"[gossip] {addr} unreachable: {error}")
+            peer.error, peer.caught_up = error, False
+            return False
+        peer.error = ""
+        peer.last_ok = time.monotonic()
+        if delta.last_seq < peer.cursor:
+            print(f"[gossip] {addr} sequence went back ({peer.cursor} -> {delta.last_seq}), resyncing")
+            peer.cursor = 0
+            return True
+        proven = [(e.serial, e.threshold_sig) for e in delta.entries
+                  if e.threshold_sig and not self.crl.proof(e.serial)]
+        valid = valid_revocations(proven, self.master_pk)
+        self.crl.add_many(valid)
+        peer.entries += len(delta.entries)
+        peer.bytes += delta.ByteSize()
+        peer.accepted += len(valid)
+        peer.rejected += len(proven) - len(valid)
+        peer.caught_up = not delta.more
+        moved = delta.last_seq != peer.cursor
+        peer.cursor = delta.last_seq
+        if valid:
+            print(f"[gossip] {len(valid)} revocations from {addr}"
+                  + (f", {len(proven) - len(valid)} rejected" if len(valid) < len(proven) else ""))
+        return moved
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({addr: peer.cursor for addr, peer in self.peers.items()}, f)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> pb.GossipStatsResponse:
+        now = time.monotonic()
+        return pb.GossipStatsResponse(rounds=self.rounds, interval=self.interval, peers=[
+            pb.PeerGossipStats(peer=addr, cursor=p.cursor, entries=p.entries, bytes=p.bytes,
+                               accepted=p.accepted, rejected=p.rejected, caught_up=p.caught_up,
+                               last_ok_age=-1 if p.last_ok is None else now - p.last_ok,
+                               error=p.error)
+            for addr, p in self.peers.items()])
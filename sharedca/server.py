@@ -1,23 +1,25 @@
-import os, json, hashlib, grpc
+import os, json, grpc, glob, uuid
+import asyncio
+import threading
+import multiprocessing
 from concurrent import futures
-from py_ecc.optimized_bls12_381 import (
-    G1, G2, multiply, curve_order as R, FQ, FQ2, pairing
-)
+from datetime import datetime, timedelta
 import proto.ca_pb2 as pb
 import proto.ca_pb2_grpc as pbg
-from common.util import bytes_to_g2_jac, bytes_to_g1
+from common.util import g2_table, precompute_lagrange
+from common.engine import get_engine
+from common.cert import Certificate, check_tbs
+from common.channels import get_stub, KEEPALIVE_OPTIONS, SERVER_KEEPALIVE_OPTIONS
+from common.fanout import collect_verified_partials, latency_tracker
+from common.shares import load_share_pks, verify_partials, aggregate_partials
+from common.crlite import FilterCascade, filter_message, MAX_VALIDITY as FILTER_MAX_VALIDITY
+from common.ocsp import ocsp_message, now, STATUSES, MAX_VALIDITY, CLOCK_SKEW
+from common.merkle import MerkleTree, root_message, current_epoch
+from common.revocation import batch_message, batch_proofs
+from sharedca.crl_store import CRLStore
+from sharedca.gossip import Gossip, peers_from_env
 
-L = 48
-
-def fq_to_bytes(x): return int(x if isinstance(x, int) else x.n).to_bytes(L, "big")
-def fq2_to_bytes(x): return fq_to_bytes(x.coeffs[0]) + fq_to_bytes(x.coeffs[1])
-def g2_to_bytes_jac(P): 
-    x, y, z = P
-    return fq2_to_bytes(x) + fq2_to_bytes(y) + fq2_to_bytes(z)
-
-def hash_to_G2_point(msg: bytes):
-    h = int.from_bytes(hashlib.sha256(msg).digest(), "big") % R
-    return multiply(G2, h)
+engine = get_engine()
 
 CONFIG_PATH = os.getenv("CONFIG_PATH", "node_config/node1.json")
 with open(CONFIG_PATH) as f:
@@ -30,71 +32,549 @@ THRESHOLD = cfg["threshold"]
 
 # Load correct master public key for this level
 with open(f"level{LEVEL}_master_pk.hex") as f:
-    MASTER_PK = bytes_to_g1(bytes.fromhex(f.read().strip()))
+    MASTER_PK = engine.g1_from_bytes(bytes.fromhex(f.read().strip()))
 
 GRPC_PORT = os.getenv("GRPC_PORT", f"5006{NODE_ID}")
+# Where this node keeps its revocation list across restarts
+CRL_DIR = os.getenv("CRL_DIR", f"crl_data/level{LEVEL}/node{NODE_ID}")
+# CRL entries per CRLSince reply / CRLStream page (default and upper bound)
+CRL_PAGE_SIZE = int(os.getenv("CRL_PAGE_SIZE", "1000"))
+CRL_MAX_PAGE_SIZE = 10000
+# Last threshold-signed Merkle root over this node's CRL (see common/merkle.py)
+ROOT_PATH = os.path.join(CRL_DIR, "root.json")
+
+# Other nodes of this level to gossip revocations with
+PEERS = peers_from_env()
+
+# Where this level's CA cert (with its chain) is found, for IssueCertificate
+CERTS_DIR = os.getenv("CERTS_DIR", "certs")
+DEFAULT_VALIDITY_DAYS = 365
+PEER_SIGN_TIMEOUT = 3  # seconds per SignPartial call to a peer
+# IssueCertificate calls one node coordinates at once in threads mode. They
+# wait on peers, so they get their own threads on top of the server pool;
+# if they could take all of it, nodes issuing at the same time would leave
+# each other no thread for SignPartial. Calls beyond this fail with "busy".
+ISSUE_MAX_CONCURRENT = int(os.getenv("ISSUE_MAX_CONCURRENT", "32"))
+
+# Most serials one batch revocation may hold
+REVOKE_BATCH_MAX = 50000
+# Most TBSes one SignPartialBatch call may hold
+SIGN_BATCH_MAX = 1000
+
+# "threads": grpc.server on a thread pool; "aio": grpc.aio on an event loop
+SERVER_MODE = os.getenv("SERVER_MODE", "threads")
+# Number of signing processes: 0 signs on the gRPC threads, "auto" uses one
+# process per core. Unset means 0, or "auto" in aio mode: signing on the
+# executor threads holds the GIL and stalls OCSP/CRL on the event loop.
+SIGN_WORKERS = os.getenv("SIGN_WORKERS", "auto" if SERVER_MODE == "aio" else "0")
+
+
+def sign_messages(msgs, sk):
+    """
+    Hash each message to G2, multiply by the share and serialize. `sk` is
+    the share as returned by engine.prepare_scalar.
+    """
+    msg_points = [engine.hash_to_g2(m) for m in msgs]
+    return [engine.g2_to_bytes(P) for P in engine.g2_mul_many(msg_points, sk)]
+
+
+# --- signing worker processes ---
+_worker_sk = None
+
+def _init_sign_worker(sk):
+    global _worker_sk
+    _worker_sk = engine.prepare_scalar(sk)
+    if engine.name == "py_ecc":
+        g2_table()
+
+def _worker_sign(msgs):
+    return sign_messages(msgs, _worker_sk)
+
+
+def make_sign_pool(workers: int):
+    """Start `workers` signing processes, each holding the share."""
+    pool = futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_sign_worker,
+        initargs=(SK_SHARE,),
+    )
+    # start every worker now, before gRPC creates its threads
+    list(pool.map(abs, range(workers)))
+    return pool
+
 
 class CANodeServicer(pbg.CANodeServicer):
-    def __init__(self):
+    def __init__(self, sign_pool=None, sign_workers: int = 1):
         self.index = NODE_ID
         self.sk_i  = SK_SHARE
-        self.crl   = {}
+        self._sk_prepared = engine.prepare_scalar(SK_SHARE)  # recoded once at startup
+        self.crl   = CRLStore(CRL_DIR)
+        self.sign_pool = sign_pool
+        self.sign_workers = sign_workers
+        self._tree = None   # (seq, MerkleTree) over the proven revocations up to seq
+        self._root = None   # (SignedCRLRoot, seq, MerkleTree) that OCSP proofs refer to
+        self._load_root()
+        self.gossip = Gossip(self.crl, PEERS, MASTER_PK, CRL_DIR) if PEERS else None
+        self.share_pks = load_share_pks(LEVEL)
+        self._issue_slots = threading.BoundedSemaphore(ISSUE_MAX_CONCURRENT)
+        if PEERS:
+            precompute_lagrange(len(PEERS) + 1, THRESHOLD)
+
+    def _current_tree(self):
+        """Merkle tree over the CRL as it is now, rebuilt only when the CRL changed."""
+        seq = self.crl.seq
+        if self._tree is None or self._tree[0] != seq:
+            self._tree = (seq, MerkleTree(self.crl.proven(upto=seq)))
+        return self._tree
+
+    def _load_root(self):
+        if not os.path.exists(ROOT_PATH):
+            return
+        with open(ROOT_PATH) as f:
+            rec = json.load(f)
+        tree = MerkleTree(self.crl.proven(upto=rec["seq"]))
+        if tree.root.hex() != rec["root"]:
+            print(f"[Node {self.index}] signed CRL root does not match the recovered CRL, dropped")
+            return
+        root = pb.SignedCRLRoot(epoch=rec["epoch"], size=rec["size"], root=tree.root,
+                                threshold_sig=bytes.fromhex(rec["sig"]))
+        self._root = (root, rec["seq"], tree)
+
+    def _save_root(self, root, seq):
+        tmp = ROOT_PATH + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"epoch": root.epoch, "size": root.size, "root": root.root.hex(),
+                       "sig": root.threshold_sig.hex(), "seq": seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ROOT_PATH)
+
+    def _proof(self, tree, serial):
+        return pb.MerkleProof(leaves=[pb.MerkleLeaf(serial=s, index=i, path=path)
+                                      for s, i, path in tree.proof(serial)])
+
+    def _sign(self, msgs):
+        """Partial-sign msgs, in the process pool if there is one."""
+        if not msgs:
+            return []
+        if self.sign_pool is None:
+            return sign_messages(msgs, self._sk_prepared)
+        size = -(-len(msgs) // self.sign_workers)
+        chunks = [msgs[i:i + size] for i in range(0, len(msgs), size)]
+        return [sig for part in self.sign_pool.map(_worker_sign, chunks) for sig in part]
+
+    def _ca_chain(self):
+        """This level's CA cert followed by its chain, as the clients store it."""
+        for path in sorted(glob.glob(os.path.join(CERTS_DIR, f"level{LEVEL}_*.pem"))):
+            with open(path, "rb") as f:
+                chain = Certificate.from_pem(f.read())
+            if chain and chain[0].is_ca and chain[0].subject_cn == f"Level{LEVEL}CA":
+                return chain
+        raise RuntimeError(f"no Level{LEVEL}CA cert in {CERTS_DIR}")
+
+    def _new_cert(self, request):
+        """The cert for a CSR, its CA chain and this node's partial on its TBS."""
+        if request.validity_days < 0:
+            raise ValueError("validity_days must not be negative")
+        chain = self._ca_chain()
+        now = datetime.utcnow()
+        cert = Certificate(
+            serial=str(uuid.uuid4()),
+            subject_cn=request.subject_cn,
+            issuer_cn=f"Level{LEVEL}CA",
+            not_before=now,
+            not_after=now + timedelta(days=request.validity_days or DEFAULT_VALIDITY_DAYS),
+            subject_pub_pem=request.public_key,
+            is_ca=request.is_ca,
+        )
+        return cert, chain, [(self.index, self._sign([cert.to_tbs()])[0])]
+
+    def _finish_cert(self, cert, chain, parts) -> pb.CertResponse:
+        """Aggregate the partials on `cert`, check the result and return the PEM (cert + chain)."""
+        if len(parts) < THRESHOLD:
+            return pb.CertResponse(ok=False, msg=f"only {len(parts)} of {THRESHOLD} partials")
+        agg = aggregate_partials(parts)
+        if not engine.pairing_check([(agg, engine.G1_neg), (engine.hash_to_g2(cert.to_tbs()), MASTER_PK)]):
+            return pb.CertResponse(ok=False, msg="aggregated signature does not verify")
+        cert.signature = engine.g2_to_bytes(agg)
+        return pb.CertResponse(ok=True, msg=f"issued {cert.serial}", certificate=cert.to_pem(chain=chain))
+
+    def IssueCertificate(self, request, context):
+        """
+        Act as coordinator: build the TBS, sign it here and collect the
+        other partials from PEERS, aggregate, verify and return the PEM
+        (cert + chain).
+        """
+        if not self._issue_slots.acquire(blocking=False):
+            return pb.CertResponse(ok=False, msg=f"busy: {ISSUE_MAX_CONCURRENT} issuances in progress")
+        try:
+            cert, chain, parts = self._new_cert(request)
+            tbs = cert.to_tbs()
+            req = pb.NodeSignReq(tbs_cert=tbs, req_id=cert.serial)
+
+            def invoke(addr):
+                return get_stub(addr).SignPartial.future(req, timeout=PEER_SIGN_TIMEOUT)
+
+            parts += collect_verified_partials(PEERS, invoke, THRESHOLD - 1,
+                                               lambda ps: verify_partials(tbs, ps, self.share_pks),
+                                               "hedged", latency_tracker("SignPartial"),
+                                               held=[self.index])
+            return self._finish_cert(cert, chain, parts)
+        except Exception as e:
+            print(f"[Node {self.index}] IssueCertificate failed:", e)
+            return pb.CertResponse(ok=False, msg=str(e))
+        finally:
+            self._issue_slots.release()
 
     def SignPartial(self, request, context):
         try:
-            msg_point = hash_to_G2_point(request.tbs_cert)
-            sig_point = multiply(msg_point, self.sk_i)
-            sig_bytes = g2_to_bytes_jac(sig_point)
+            check_tbs(request.tbs_cert)
+            sig_bytes = self._sign([request.tbs_cert])[0]
             return pb.NodeSignResp(ok=True, msg="ok", partial_sig=sig_bytes, node_index=self.index)
         except Exception as e:
             return pb.NodeSignResp(ok=False, msg=str(e), partial_sig=b"", node_index=self.index)
 
+    def SignPartialBatch(self, request, context):
+        try:
+            if not 0 < len(request.tbs_certs) <= SIGN_BATCH_MAX:
+                raise ValueError(f"batch must hold 1..{SIGN_BATCH_MAX} TBS certs")
+            for tbs in request.tbs_certs:
+                check_tbs(tbs)
+            sigs = self._sign(list(request.tbs_certs))
+            return pb.NodeSignBatchResp(ok=True, msg="ok", partial_sigs=sigs, node_index=self.index)
+        except Exception as e:
+            return pb.NodeSignBatchResp(ok=False, msg=str(e), partial_sigs=[], node_index=self.index)
+
     def SignRevokePartial(self, request, context):
         try:
             serial = request.serial
             msg = f"REVOKE:{serial}".encode()
-            msg_point = hash_to_G2_point(msg)
-            sig_point = multiply(msg_point, self.sk_i)
-            sig_bytes = g2_to_bytes_jac(sig_point)
-            self.crl[serial] = True
+            sig_bytes = self._sign([msg])[0]
+            self.crl.add(serial)
             return pb.NodeSignResp(ok=True, msg="ok", partial_sig=sig_bytes, node_index=self.index)
         except Exception as e:
             print(f"[Node {self.index}] SignRevokePartial failed:", e)
             return pb.NodeSignResp(ok=False, msg=str(e), partial_sig=b"", node_index=self.index)
 
+    def SignRevokeBatchPartial(self, request, context):
+        """Partial-sign the commitment to a batch of serials and record them (unproven)."""
+        try:
+            if not 0 < len(request.serials) <= REVOKE_BATCH_MAX:
+                raise ValueError(f"batch must hold 1..{REVOKE_BATCH_MAX} serials")
+            tree = MerkleTree(request.serials)
+            sig_bytes = self._sign([batch_message(len(tree), tree.root)])[0]
+            self.crl.add_many((serial, b"") for serial in tree.leaves)
+            return pb.NodeSignResp(ok=True, msg="ok", partial_sig=sig_bytes, node_index=self.index)
+        except Exception as e:
+            print(f"[Node {self.index}] SignRevokeBatchPartial failed:", e)
+            return pb.NodeSignResp(ok=False, msg=str(e), partial_sig=b"", node_index=self.index)
+
+    def SignFilterPartial(self, request, context):
+        """
+        Partial-sign a CRLite filter, if its validity window is sane and it
+        reports every proven revocation this node holds.
+        """
+        try:
+            cascade = FilterCascade.from_bytes(request.filter)
+            if cascade.ca_level != LEVEL:
+                raise ValueError(f"filter is for level {cascade.ca_level}, this node is level {LEVEL}")
+            if cascade.built_at > now() + CLOCK_SKEW or not 0 < cascade.next_update - cascade.built_at <= FILTER_MAX_VALIDITY:
+                raise ValueError("bad filter validity window")
+            missing = [s for s in self.crl.serials()
+                       if self.crl.proof(s) and not (cascade.covers(s) and cascade.is_revoked(s))]
+            if missing:
+                raise ValueError(f"filter misses {len(missing)} revoked serials, e.g. {missing[0]}")
+            sig_bytes = self._sign([filter_message(request.filter)])[0]
+            return pb.NodeSignResp(ok=True, msg="ok", partial_sig=sig_bytes, node_index=self.index)
+        except Exception as e:
+            return pb.NodeSignResp(ok=False, msg=str(e), partial_sig=b"", node_index=self.index)
+
+    def SignOCSPBatchPartial(self, request, context):
+        """
+        Partial-sign pre-computed OCSP responses. Every status has to match
+        this node's own CRL, and the validity window has to be sane.
+        """
+        try:
+            t = now()
+            msgs = []
+            for item in request.items:
+                status = pb.OCSPResponse.Status.Name(item.status)
+                if status not in STATUSES:
+                    raise ValueError(f"cannot sign status {status}")
+                mine = "REVOKED" if item.serial in self.crl else "GOOD"
+                if status != mine:
+                    raise ValueError(f"{item.serial} is {mine} on this node, not {status}")
+                if item.this_update > t + CLOCK_SKEW or not 0 < item.next_update - item.this_update <= MAX_VALIDITY:
+                    raise ValueError(f"bad validity window for {item.serial}")
+                msgs.append(ocsp_message(item.serial, status, item.this_update, item.next_update))
+            sigs = self._sign(msgs)
+            return pb.NodeSignBatchResp(ok=True, msg="ok", partial_sigs=sigs, node_index=self.index)
+        except Exception as e:
+            return pb.NodeSignBatchResp(ok=False, msg=str(e), partial_sigs=[], node_index=self.index)
+
+    def SignRootPartial(self, request, context):
+        """Partial-sign this epoch's Merkle root, if it is the root of this node's CRL."""
+        try:
+            t = now()
+            if request.epoch not in (current_epoch(t - CLOCK_SKEW), current_epoch(t + CLOCK_SKEW)):
+                raise ValueError(f"epoch {request.epoch} is not the current epoch")
+            _, tree = self._current_tree()
+            if request.size != len(tree) or request.root != tree.root:
+                raise ValueError(f"root does not match this node's CRL ({len(tree)} proven revocations)")
+            sig_bytes = self._sign([root_message(request.epoch, request.size, request.root)])[0]
+            return pb.NodeSignResp(ok=True, msg="ok", partial_sig=sig_bytes, node_index=self.index)
+        except Exception as e:
+            return pb.NodeSignResp(ok=False, msg=str(e), partial_sig=b"", node_index=self.index)
+
+    def ApplyRoot(self, request, context):
+        """Install a threshold-signed root; OCSP answers carry proofs against it from now on."""
+        try:
+            agg = engine.g2_from_bytes(request.threshold_sig)
+            msg_point = engine.hash_to_g2(root_message(request.epoch, request.size, request.root))
+            if not engine.pairing_check([(agg, engine.G1_neg), (msg_point, MASTER_PK)]):
+                return pb.RevokeResponse(ok=False, msg="invalid threshold signature on root")
+            if self._root is not None and request.epoch < self._root[0].epoch:
+                return pb.RevokeResponse(ok=False, msg=f"already have a root for epoch {self._root[0].epoch}")
+            seq, tree = self._current_tree()
+            if request.size != len(tree) or request.root != tree.root:
+                return pb.RevokeResponse(ok=False, msg="root does not match this node's CRL")
+            self._save_root(request, seq)
+            self._root = (request, seq, tree)
+            return pb.RevokeResponse(ok=True, msg=f"root for epoch {request.epoch} applied")
+        except Exception as e:
+            return pb.RevokeResponse(ok=False, msg=str(e))
+
     def Revoke(self, request, context):
-        self.crl[request.serial] = True
+        self.crl.add(request.serial)
         return pb.RevokeResponse(ok=True, msg="revoked")
 
     def CRL(self, request, context):
-        return pb.CRLResponse(revoked_serials=list(self.crl.keys()), threshold_sig=b"")
+        seq = self.crl.seq
+        return pb.CRLResponse(revoked_serials=self.crl.serials(), threshold_sig=b"", last_seq=seq)
+
+    def _crl_entries(self, since_seq, limit):
+        limit = min(limit or CRL_PAGE_SIZE, CRL_MAX_PAGE_SIZE)
+        entries, cursor, more = self.crl.since(since_seq, limit)
+        return [pb.CRLEntry(serial=s, seq=q, threshold_sig=sig) for s, q, sig in entries], cursor, more
+
+    def CRLSince(self, request, context):
+        entries, cursor, more = self._crl_entries(request.since_seq, request.limit)
+        return pb.CRLDelta(entries=entries, last_seq=cursor, more=more)
+
+    def CRLStream(self, request, context):
+        cursor, more = 0, True
+        while more:
+            entries, cursor, more = self._crl_entries(cursor, request.page_size)
+            yield pb.CRLPage(entries=entries, last_seq=cursor)
+
+    def GossipStats(self, request, context):
+        if self.gossip is None:
+            return pb.GossipStatsResponse()
+        return self.gossip.stats()
 
     def OCSP(self, request, context):
         status = pb.OCSPResponse.GOOD
         if request.serial in self.crl:
             status = pb.OCSPResponse.REVOKED
-        return pb.OCSPResponse(status=status, threshold_sig=b"")
+        if self._root is None:
+            return pb.OCSPResponse(status=status, threshold_sig=b"")
+        root, _, tree = self._root
+        return pb.OCSPResponse(status=status, threshold_sig=b"", root=root,
+                               proof=self._proof(tree, request.serial))
+
+    def OCSPBatch(self, request, context):
+        statuses = [pb.OCSPResponse.REVOKED if serial in self.crl else pb.OCSPResponse.GOOD
+                    for serial in request.serials]
+        if self._root is None:
+            return pb.OCSPBatchResponse(statuses=statuses)
+        root, _, tree = self._root
+        return pb.OCSPBatchResponse(statuses=statuses, root=root,
+                                    proofs=[self._proof(tree, serial) for serial in request.serials])
 
     def ApplyRevocation(self, request, context):
         try:
-            agg = bytes_to_g2_jac(request.threshold_sig)
+            agg = engine.g2_from_bytes(request.threshold_sig)
             msg = f"REVOKE:{request.serial}".encode()
-            msg_point = hash_to_G2_point(msg)
-            if pairing(agg, G1) == pairing(msg_point, MASTER_PK):
-                self.crl[request.serial] = True
+            msg_point = engine.hash_to_g2(msg)
+            if engine.pairing_check([(agg, engine.G1_neg), (msg_point, MASTER_PK)]):
+                self.crl.add(request.serial, request.threshold_sig)
                 return pb.RevokeResponse(ok=True, msg="revocation applied")
             else:
                 return pb.RevokeResponse(ok=False, msg="invalid threshold revocation proof")
         except Exception as e:
             return pb.RevokeResponse(ok=False, msg=str(e))
 
+    def ApplyRevocationBatch(self, request, context):
+        """Check a batch's threshold signature once, then record every serial with its own proof."""
+        try:
+            if not 0 < len(request.serials) <= REVOKE_BATCH_MAX:
+                return pb.RevokeResponse(ok=False, msg=f"batch must hold 1..{REVOKE_BATCH_MAX} serials")
+            tree = MerkleTree(request.serials)
+            agg = engine.g2_from_bytes(request.threshold_sig)
+            msg_point = engine.hash_to_g2(batch_message(len(tree), tree.root))
+            if not engine.pairing_check([(agg, engine.G1_neg), (msg_point, MASTER_PK)]):
+                return pb.RevokeResponse(ok=False, msg="invalid threshold batch revocation proof")
+            added = self.crl.add_many(batch_proofs(tree, request.threshold_sig).items())
+            return pb.RevokeResponse(ok=True, msg=f"batch of {len(tree)} applied ({added} new)")
+        except Exception as e:
+            return pb.RevokeResponse(ok=False, msg=str(e))
+
+
+class AioCANodeServicer(pbg.CANodeServicer):
+    """
+    grpc.aio front end for CANodeServicer. Cheap RPCs (OCSP, CRL) run
+    directly on the event loop; signing, proof verification and anything
+    that writes the CRL to disk are sent to an executor so they never hold
+    up the loop. IssueCertificate waits for the peers on the loop, so no
+    executor thread is held while peers sign.
+    """
+    def __init__(self, node: CANodeServicer, executor):
+        self.node = node
+        self.executor = executor
+        self._peer_stubs = {}  # addr -> stub on a grpc.aio channel
+
+    async def _offload(self, fn, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, request, context)
+
+    def _peer_stub(self, addr):
+        if addr not in self._peer_stubs:
+            channel = grpc.aio.insecure_channel(addr, options=KEEPALIVE_OPTIONS)
+            self._peer_stubs[addr] = pbg.CANodeStub(channel)
+        return self._peer_stubs[addr]
+
+    async def _peer_partials(self, tbs: bytes, req_id: str):
+        """Ask every peer for its partial on `tbs`; return the first THRESHOLD - 1 that verify."""
+        loop = asyncio.get_running_loop()
+        req = pb.NodeSignReq(tbs_cert=tbs, req_id=req_id)
+        calls = [asyncio.ensure_future(self._peer_stub(addr).SignPartial(req, timeout=PEER_SIGN_TIMEOUT))
+                 for addr in PEERS]
+        parts, seen = [], {self.node.index}
+        try:
+            for call in asyncio.as_completed(calls):
+                if len(parts) >= THRESHOLD - 1:
+                    break
+                try:
+                    resp = await call
+                except grpc.RpcError:
+                    continue
+                if not resp.ok or resp.node_index in seen:
+                    continue
+                good, _ = await loop.run_in_executor(self.executor, verify_partials, tbs,
+                                                     [(resp.node_index, resp.partial_sig)], self.node.share_pks)
+                seen.update(i for i, _ in good)
+                parts += good
+        finally:
+            for call in calls:
+                call.cancel()
+        return parts
+
+    async def IssueCertificate(self, request, context):
+        loop = asyncio.get_running_loop()
+        try:
+            cert, chain, parts = await loop.run_in_executor(self.executor, self.node._new_cert, request)
+            parts += await self._peer_partials(cert.to_tbs(), cert.serial)
+            return await loop.run_in_executor(self.executor, self.node._finish_cert, cert, chain, parts)
+        except Exception as e:
+            print(f"[Node {self.node.index}] IssueCertificate failed:", e)
+            return pb.CertResponse(ok=False, msg=str(e))
+
+    async def SignPartial(self, request, context):
+        return await self._offload(self.node.SignPartial, request, context)
+
+    async def SignPartialBatch(self, request, context):
+        return await self._offload(self.node.SignPartialBatch, request, context)
+
+    async def SignRevokePartial(self, request, context):
+        return await self._offload(self.node.SignRevokePartial, request, context)
+
+    async def SignFilterPartial(self, request, context):
+        return await self._offload(self.node.SignFilterPartial, request, context)
+
+    async def SignOCSPBatchPartial(self, request, context):
+        return await self._offload(self.node.SignOCSPBatchPartial, request, context)
+
+    async def SignRootPartial(self, request, context):
+        return await self._offload(self.node.SignRootPartial, request, context)
+
+    async def ApplyRoot(self, request, context):
+        return await self._offload(self.node.ApplyRoot, request, context)
+
+    async def SignRevokeBatchPartial(self, request, context):
+        return await self._offload(self.node.SignRevokeBatchPartial, request, context)
+
+    async def ApplyRevocationBatch(self, request, context):
+        return await self._offload(self.node.ApplyRevocationBatch, request, context)
+
+    async def ApplyRevocation(self, request, context):
+        return await self._offload(self.node.ApplyRevocation, request, context)
+
+    async def Revoke(self, request, context):
+        return await self._offload(self.node.Revoke, request, context)
+
+    async def CRL(self, request, context):
+        return self.node.CRL(request, context)
+
+    async def CRLSince(self, request, context):
+        return self.node.CRLSince(request, context)
+
+    async def CRLStream(self, request, context):
+        for page in self.node.CRLStream(request, context):
+            yield page
+
+    async def GossipStats(self, request, context):
+        return self.node.GossipStats(request, context)
+
+    async def OCSP(self, request, context):
+        return self.node.OCSP(request, context)
+
+    async def OCSPBatch(self, request, context):
+        return self.node.OCSPBatch(request, context)
+
+
+def _make_node():
+    """Build the servicer (and its signing pool). Returns (servicer, workers, description)."""
+    if engine.name == "py_ecc":
+        g2_table()  # build the fixed-base table before the first request
+    workers = os.cpu_count() if SIGN_WORKERS == "auto" else int(SIGN_WORKERS)
+    sign_pool = make_sign_pool(workers) if workers > 0 else None
+    mode = f"{workers} signing processes" if sign_pool else "signing on gRPC threads"
+    if SERVER_MODE == "aio" and sign_pool is None:
+        print("WARNING: SERVER_MODE=aio with SIGN_WORKERS=0 signs on executor threads; "
+              "they hold the GIL, so OCSP/CRL on the event loop stall while signing")
+    node = CANodeServicer(sign_pool, max(workers, 1))
+    if node.gossip is not None:
+        node.gossip.start()
+        mode += f", gossip with {len(PEERS)} peers"
+    return node, workers, mode
+
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    pbg.add_CANodeServicer_to_server(CANodeServicer(), server)
+    node, workers, mode = _make_node()
+    threads = max(10, 2 * workers) + ISSUE_MAX_CONCURRENT
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=threads),
+                         options=SERVER_KEEPALIVE_OPTIONS)
+    pbg.add_CANodeServicer_to_server(node, server)
     server.add_insecure_port(f"[::]:{GRPC_PORT}")
-    print(f"CA-Node {NODE_ID} (level {LEVEL}) listening on {GRPC_PORT}")
+    print(f"CA-Node {NODE_ID} (level {LEVEL}) listening on {GRPC_PORT} [{engine.name}, {mode}]")
     server.start()
     server.wait_for_termination()
 
+
+async def _serve_aio(node, workers, mode):
+    executor = futures.ThreadPoolExecutor(max_workers=max(10, 2 * workers))
+    server = grpc.aio.server(options=SERVER_KEEPALIVE_OPTIONS)
+    pbg.add_CANodeServicer_to_server(AioCANodeServicer(node, executor), server)
+    server.add_insecure_port(f"[::]:{GRPC_PORT}")
+    print(f"CA-Node {NODE_ID} (level {LEVEL}) listening on {GRPC_PORT} [{engine.name}, {mode}, asyncio]")
+    await server.start()
+    await server.wait_for_termination()
+
+
+def serve_aio():
+    asyncio.run(_serve_aio(*_make_node()))
+
+
 if __name__ == "__main__":
-    serve()
+    serve_aio() if SERVER_MODE == "aio" else serve()